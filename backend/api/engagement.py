@@ -2,18 +2,19 @@
 API routes for engagement management
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database.db import get_db
 from database import models, schema
 from database.schema import EngagementLogResponse, EngagementUpdate
-from services.engagement_service import EngagementService
+from services.engagement_service import get_engagement_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/engagement", tags=["engagement"])
-engagement_service = EngagementService()
+engagement_service = get_engagement_service()
 
 
 @router.post("/log", response_model=EngagementLogResponse)
@@ -22,7 +23,7 @@ async def log_engagement(
     session_id: int,
     response_time_ms: int,
     is_correct: bool,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Log student engagement based on response
@@ -38,7 +39,7 @@ async def log_engagement(
         Created engagement log
     """
     try:
-        engagement_log = engagement_service.log_engagement(
+        engagement_log = await engagement_service.log_engagement(
             db, student_id, session_id, response_time_ms, is_correct
         )
         return engagement_log
@@ -51,7 +52,7 @@ async def log_engagement(
 async def get_session_engagement_logs(
     session_id: int,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get engagement logs for a session
@@ -64,21 +65,20 @@ async def get_session_engagement_logs(
     Returns:
         List of engagement logs
     """
-    logs = (
-        db.query(models.EngagementLog)
-        .filter(models.EngagementLog.session_id == session_id)
+    result = await db.execute(
+        select(models.EngagementLog)
+        .where(models.EngagementLog.session_id == session_id)
         .order_by(models.EngagementLog.timestamp.desc())
         .limit(limit)
-        .all()
     )
     
-    return logs
+    return result.scalars().all()
 
 
 @router.get("/session/{session_id}/stats")
 async def get_session_engagement_stats(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get aggregated engagement statistics for a session
@@ -90,7 +90,7 @@ async def get_session_engagement_stats(
     Returns:
         Dictionary with engagement statistics
     """
-    stats = engagement_service.get_session_engagement_stats(db, session_id)
+    stats = await engagement_service.get_session_engagement_stats(db, session_id)
     return stats
 
 
@@ -98,7 +98,7 @@ async def get_session_engagement_stats(
 async def get_student_current_engagement(
     student_id: int,
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current engagement level for a student
@@ -111,13 +111,7 @@ async def get_student_current_engagement(
     Returns:
         Latest engagement log
     """
-    log = (
-        db.query(models.EngagementLog)
-        .filter(models.EngagementLog.student_id == student_id)
-        .filter(models.EngagementLog.session_id == session_id)
-        .order_by(models.EngagementLog.timestamp.desc())
-        .first()
-    )
+    log = await engagement_service.get_latest_engagement_log(db, student_id, session_id)
     
     if not log:
         raise HTTPException(status_code=404, detail="No engagement data found")
@@ -130,7 +124,7 @@ async def get_student_engagement_history(
     student_id: int,
     session_id: int,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get engagement history for a student
@@ -144,7 +138,7 @@ async def get_student_engagement_history(
     Returns:
         List of engagement logs
     """
-    history = engagement_service.get_student_engagement_history(
+    history = await engagement_service.get_student_engagement_history(
         db, student_id, session_id, limit
     )
     return history
@@ -1,25 +1,62 @@
 """
 API routes for question management
 """
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response
+from pydantic import TypeAdapter
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Tuple
 from database.db import get_db
 from database import models, schema
-from database.schema import QuestionResponse, QuestionCreate
-from services.text_extractor import extract_text_by_type
+from database.schema import QuestionResponse, QuestionCreate, QuestionListItem
+from services.text_extractor import extract_text_async
 from services.question_generator import generate_questions_mock
+from services.answer_cache import get_answer_cache
+import hashlib
 import logging
+import os
+import tempfile
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/questions", tags=["questions"])
 
+# Read uploads in 1 MiB chunks
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Serialized question reads (body, ETag), cleared whenever questions change
+_questions_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_question_list_adapter = TypeAdapter(List[QuestionListItem])
+
+
+def _cache_payload(key: Tuple, body: bytes) -> Tuple[bytes, str]:
+    """Store a serialized payload with its content-derived ETag"""
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    _questions_cache[key] = (body, etag)
+    return body, etag
+
+
+def _cached_response(request: Request, entry: Tuple[bytes, str]) -> Response:
+    """Build a 200 response, or 304 if the client already holds this ETag"""
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def invalidate_questions_cache():
+    """Drop cached question reads after a create/update/delete"""
+    _questions_cache.clear()
+
 
 @router.post("/upload-slides", response_model=List[QuestionResponse])
 async def upload_slides_and_generate_questions(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload lecture slides and generate questions
@@ -31,14 +68,24 @@ async def upload_slides_and_generate_questions(
     Returns:
         List of generated questions
     """
+    tmp_path = None
+    
     try:
-        # Read file content
-        file_content = await file.read()
         file_type = file.content_type
         
+        # Stream the upload to a temporary file instead of buffering it in memory
+        # and hash it on the way, so re-uploads of the same deck hit the extraction cache
+        suffix = os.path.splitext(file.filename or "")[1]
+        content_hash = hashlib.blake2b(digest_size=16)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp_path = tmp.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                tmp.write(chunk)
+                content_hash.update(chunk)
+        
         # Extract text from slides
         logger.info(f"Extracting text from {file.filename} (type: {file_type})")
-        text_chunks = extract_text_by_type(file_content, file_type)
+        text_chunks = await extract_text_async(tmp_path, file_type, content_hash.hexdigest())
         
         if not text_chunks:
             raise HTTPException(status_code=400, detail="No text extracted from file")
@@ -47,19 +94,19 @@ async def upload_slides_and_generate_questions(
         logger.info(f"Generating questions from {len(text_chunks)} text chunks")
         generated_questions = generate_questions_mock(text_chunks, num_questions=min(10, len(text_chunks)))
         
-        # Save questions to database
-        saved_questions = []
-        for i, q_data in enumerate(generated_questions):
-            question = models.Question(
+        # Save questions to database in a single batched INSERT ... RETURNING
+        saved_questions = [
+            models.Question(
                 text=q_data['text'],
                 correct_answer=q_data['correct_answer'],
                 source_slide=f"{file.filename} - Slide {q_data.get('source_slide', i) + 1}",
                 subject="Lecture Material"  # Can be extracted from file metadata
             )
-            db.add(question)
-            db.commit()
-            db.refresh(question)
-            saved_questions.append(question)
+            for i, q_data in enumerate(generated_questions)
+        ]
+        db.add_all(saved_questions)
+        await db.commit()
+        invalidate_questions_cache()
         
         logger.info(f"Successfully generated {len(saved_questions)} questions")
         return saved_questions
@@ -69,56 +116,81 @@ async def upload_slides_and_generate_questions(
     except Exception as e:
         logger.error(f"Error generating questions: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate questions")
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
 
 
-@router.get("/", response_model=List[QuestionResponse])
+@router.get("/", response_model=List[QuestionListItem])
 async def get_all_questions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all questions
     
     Args:
+        request: Incoming request (for If-None-Match)
         skip: Number of questions to skip
         limit: Maximum number of questions to return
         db: Database session
     
     Returns:
-        List of questions
+        List of questions (id, text, subject)
     """
-    questions = db.query(models.Question).offset(skip).limit(limit).all()
-    return questions
+    key = ("list", skip, limit)
+    entry = _questions_cache.get(key)
+    
+    if entry is None:
+        result = await db.execute(
+            select(models.Question.id, models.Question.text, models.Question.subject)
+            .offset(skip)
+            .limit(limit)
+        )
+        items = [QuestionListItem.model_validate(row) for row in result]
+        entry = _cache_payload(key, _question_list_adapter.dump_json(items))
+    
+    return _cached_response(request, entry)
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
 async def get_question(
     question_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific question by ID
     
     Args:
         question_id: Question ID
+        request: Incoming request (for If-None-Match)
         db: Database session
     
     Returns:
         Question details
     """
-    question = db.query(models.Question).filter(models.Question.id == question_id).first()
+    key = ("item", question_id)
+    entry = _questions_cache.get(key)
     
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    if entry is None:
+        question = await db.get(models.Question, question_id)
+        
+        if not question:
+            raise HTTPException(status_code=404, detail="Question not found")
+        
+        body = QuestionResponse.model_validate(question).model_dump_json().encode()
+        entry = _cache_payload(key, body)
     
-    return question
+    return _cached_response(request, entry)
 
 
 @router.post("/", response_model=QuestionResponse)
 async def create_question(
     question: QuestionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new question manually
@@ -132,8 +204,9 @@ async def create_question(
     """
     db_question = models.Question(**question.dict())
     db.add(db_question)
-    db.commit()
-    db.refresh(db_question)
+    await db.commit()
+    await db.refresh(db_question)
+    invalidate_questions_cache()
     
     logger.info(f"Created question {db_question.id}")
     return db_question
@@ -142,7 +215,7 @@ async def create_question(
 @router.delete("/{question_id}")
 async def delete_question(
     question_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a question
@@ -151,13 +224,15 @@ async def delete_question(
         question_id: Question ID
         db: Database session
     """
-    question = db.query(models.Question).filter(models.Question.id == question_id).first()
+    question = await db.get(models.Question, question_id)
     
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
-    db.delete(question)
-    db.commit()
+    await db.delete(question)
+    await db.commit()
+    get_answer_cache().invalidate(question_id)
+    invalidate_questions_cache()
     
     logger.info(f"Deleted question {question_id}")
     return {"message": "Question deleted successfully"}
@@ -2,12 +2,14 @@
 API routes for student responses
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database.db import get_db
 from database import models, schema
 from database.schema import ResponseCreate, ResponseResponse
-from services.engagement_service import EngagementService
+from services.engagement_service import get_engagement_service
+from services.answer_cache import get_answer_cache
 from websocket.instructor_ws import get_instructor_ws_manager
 from websocket.student_ws import get_student_ws_manager
 import logging
@@ -16,14 +18,28 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/responses", tags=["responses"])
-engagement_service = EngagementService()
+engagement_service = get_engagement_service()
+answer_cache = get_answer_cache()
 instructor_ws = get_instructor_ws_manager()
 
+# Columns serialized by ResponseResponse; list endpoints select these
+# directly instead of hydrating full ORM objects
+_response_columns = (
+    models.Response.id,
+    models.Response.student_id,
+    models.Response.question_id,
+    models.Response.session_id,
+    models.Response.response_text,
+    models.Response.response_time_ms,
+    models.Response.is_correct,
+    models.Response.timestamp,
+)
+
 
 @router.post("/", response_model=ResponseResponse)
 async def submit_response(
     response: ResponseCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Submit a student response to a question
@@ -36,14 +52,14 @@ async def submit_response(
         Created response
     """
     try:
-        # Get question to verify answer
-        question = db.query(models.Question).filter(models.Question.id == response.question_id).first()
+        # Get (cached) correct-answer hash to verify response
+        correct_hash = await answer_cache.get_correct_answer_hash(db, response.question_id)
         
-        if not question:
+        if correct_hash is None:
             raise HTTPException(status_code=404, detail="Question not found")
         
-        # Check if answer is correct (simple string comparison for now)
-        is_correct = response.response_text.lower().strip() == question.correct_answer.lower().strip()
+        # Check if answer is correct (normalized text compared via 8-byte hash)
+        is_correct = models.hash_answer(response.response_text) == correct_hash
         
         # Create response record
         db_response = models.Response(
@@ -56,12 +72,11 @@ async def submit_response(
         )
         
         db.add(db_response)
-        db.commit()
-        db.refresh(db_response)
+        await db.commit()
+        await db.refresh(db_response)
         
-        # Log engagement
-        engagement_service.log_engagement(
-            db,
+        # Queue engagement log for the batched background writer
+        await engagement_service.enqueue_engagement(
             response.student_id,
             response.session_id,
             response.response_time_ms,
@@ -83,7 +98,7 @@ async def submit_response(
 async def get_all_responses(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all responses
@@ -96,15 +111,15 @@ async def get_all_responses(
     Returns:
         List of responses
     """
-    responses = db.query(models.Response).offset(skip).limit(limit).all()
-    return responses
+    result = await db.execute(select(*_response_columns).offset(skip).limit(limit))
+    return result.all()
 
 
 @router.get("/session/{session_id}", response_model=List[ResponseResponse])
 async def get_session_responses(
     session_id: int,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all responses for a session
@@ -117,15 +132,14 @@ async def get_session_responses(
     Returns:
         List of responses
     """
-    responses = (
-        db.query(models.Response)
-        .filter(models.Response.session_id == session_id)
+    result = await db.execute(
+        select(*_response_columns)
+        .where(models.Response.session_id == session_id)
         .order_by(models.Response.timestamp.desc())
         .limit(limit)
-        .all()
     )
     
-    return responses
+    return result.all()
 
 
 @router.get("/student/{student_id}", response_model=List[ResponseResponse])
@@ -133,7 +147,7 @@ async def get_student_responses(
     student_id: int,
     session_id: int = None,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all responses for a student
@@ -147,11 +161,16 @@ async def get_student_responses(
     Returns:
         List of responses
     """
-    query = db.query(models.Response).filter(models.Response.student_id == student_id)
+    conditions = [models.Response.student_id == student_id]
     
     if session_id:
-        query = query.filter(models.Response.session_id == session_id)
+        conditions.append(models.Response.session_id == session_id)
     
-    responses = query.order_by(models.Response.timestamp.desc()).limit(limit).all()
-    return responses
+    result = await db.execute(
+        select(*_response_columns)
+        .where(*conditions)
+        .order_by(models.Response.timestamp.desc())
+        .limit(limit)
+    )
+    return result.all()
 
@@ -2,29 +2,30 @@
 API routes for session management
 """
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database.db import get_db
+from database.db import get_db, SessionLocal
 from database import models, schema
 from database.schema import SessionResponse, SessionCreate, DashboardStats, StudentEngagementStatus
 from zoom_integrator.session_manager import get_session_manager
 from websocket.instructor_ws import get_instructor_ws_manager
-from services.engagement_service import EngagementService
+from services.engagement_service import get_engagement_service, latest_engagement_stmt
+import asyncio
 import logging
-from sqlalchemy import func
+from sqlalchemy import select, func, case
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 session_manager = get_session_manager()
-engagement_service = EngagementService()
+engagement_service = get_engagement_service()
 instructor_ws = get_instructor_ws_manager()
 
 
 @router.post("/", response_model=SessionResponse)
 async def create_session(
     session: SessionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new session
@@ -36,7 +37,7 @@ async def create_session(
     Returns:
         Created session
     """
-    db_session = session_manager.create_session(
+    db_session = await session_manager.create_session(
         db, session.instructor_id, session.zoom_meeting_id
     )
     return db_session
@@ -46,7 +47,7 @@ async def create_session(
 async def get_all_sessions(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all sessions
@@ -59,14 +60,14 @@ async def get_all_sessions(
     Returns:
         List of sessions
     """
-    sessions = db.query(models.Session).offset(skip).limit(limit).all()
-    return sessions
+    result = await db.execute(select(models.Session).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific session by ID
@@ -78,7 +79,7 @@ async def get_session(
     Returns:
         Session details
     """
-    session = db.query(models.Session).filter(models.Session.id == session_id).first()
+    session = await db.get(models.Session, session_id)
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -90,7 +91,7 @@ async def get_session(
 async def start_session(
     session_id: int,
     student_ids: List[int],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Start a session
@@ -101,7 +102,7 @@ async def start_session(
         db: Database session
     """
     try:
-        session_manager.start_session(db, session_id, set(student_ids))
+        await session_manager.start_session(db, session_id, set(student_ids))
         return {"message": "Session started successfully"}
     except Exception as e:
         logger.error(f"Error starting session: {e}", exc_info=True)
@@ -111,7 +112,7 @@ async def start_session(
 @router.post("/{session_id}/stop")
 async def stop_session(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Stop a session
@@ -121,17 +122,30 @@ async def stop_session(
         db: Database session
     """
     try:
-        session_manager.stop_session(db, session_id)
+        await session_manager.stop_session(db, session_id)
         return {"message": "Session stopped successfully"}
     except Exception as e:
         logger.error(f"Error stopping session: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _fetch_all(stmt) -> list:
+    """Execute a statement on a dedicated pooled session and return all rows"""
+    async with SessionLocal() as db:
+        result = await db.execute(stmt)
+        return result.all()
+
+
+async def _fetch_engagement_stats(session_id: int) -> dict:
+    """Compute session engagement stats on a dedicated pooled session"""
+    async with SessionLocal() as db:
+        return await engagement_service.get_session_engagement_stats(db, session_id)
+
+
 @router.get("/{session_id}/dashboard")
 async def get_session_dashboard(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get dashboard data for a session
@@ -143,59 +157,64 @@ async def get_session_dashboard(
     Returns:
         Dashboard data with stats and student engagement
     """
-    # Get session
-    session = db.query(models.Session).filter(models.Session.id == session_id).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Get engagement stats
-    stats = engagement_service.get_session_engagement_stats(db, session_id)
+    # Students who have responded in this session
+    responded = (
+        select(models.Response.student_id)
+        .where(models.Response.session_id == session_id)
+        .distinct()
+    )
     
-    # Get unique students in session
-    student_responses = (
-        db.query(models.Response.student_id, func.count(models.Response.id).label('response_count'))
-        .filter(models.Response.session_id == session_id)
+    # Per-student response aggregates in a single GROUP BY
+    aggregates_stmt = (
+        select(
+            models.Response.student_id,
+            func.count(models.Response.id).label('response_count'),
+            func.sum(case((models.Response.is_correct, 1), else_=0)).label('correct_count'),
+            func.avg(models.Response.response_time_ms).label('avg_response_time')
+        )
+        .where(models.Response.session_id == session_id)
         .group_by(models.Response.student_id)
-        .all()
     )
     
+    # Latest engagement per student in a single DISTINCT ON scan
+    latest_stmt = latest_engagement_stmt(session_id, responded)
+    
+    # Student name/email without hydrating full User rows
+    users_stmt = (
+        select(models.User.id, models.User.name, models.User.email)
+        .where(models.User.id.in_(responded))
+    )
+    
+    # The queries are independent; run them concurrently, each on its own
+    # pooled session since an AsyncSession cannot run statements in parallel
+    session, stats, student_responses, latest_rows, user_rows = await asyncio.gather(
+        db.get(models.Session, session_id),
+        _fetch_engagement_stats(session_id),
+        _fetch_all(aggregates_stmt),
+        _fetch_all(latest_stmt),
+        _fetch_all(users_stmt)
+    )
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    engagement_by_student = {row.student_id: row.engagement_level for row in latest_rows}
+    users_by_id = {row.id: row for row in user_rows}
+    
     # Build student engagement status list
     students = []
-    for student_id, _ in student_responses:
-        # Get latest engagement
-        engagement_log = (
-            db.query(models.EngagementLog)
-            .filter(models.EngagementLog.student_id == student_id)
-            .filter(models.EngagementLog.session_id == session_id)
-            .order_by(models.EngagementLog.timestamp.desc())
-            .first()
-        )
-        
-        current_engagement = engagement_log.engagement_level if engagement_log else models.EngagementLevel.MODERATE
-        
-        # Get response stats
-        responses = (
-            db.query(models.Response)
-            .filter(models.Response.student_id == student_id)
-            .filter(models.Response.session_id == session_id)
-            .all()
-        )
-        
-        response_count = len(responses)
-        correct_count = sum(1 for r in responses if r.is_correct)
-        avg_response_time = sum(r.response_time_ms for r in responses) / response_count if response_count > 0 else 0
-        
-        # Get student info
-        student = db.query(models.User).filter(models.User.id == student_id).first()
+    for row in student_responses:
+        student_id = row.student_id
+        student = users_by_id.get(student_id)
         
         students.append(StudentEngagementStatus(
             student_id=student_id,
             student_name=student.name if student else f"Student {student_id}",
             student_email=student.email if student else "",
-            current_engagement=current_engagement,
-            response_count=response_count,
-            correct_count=correct_count,
-            avg_response_time=avg_response_time
+            current_engagement=engagement_by_student.get(student_id, models.EngagementLevel.MODERATE),
+            response_count=row.response_count,
+            correct_count=row.correct_count or 0,
+            avg_response_time=float(row.avg_response_time or 0)
         ))
     
     return {
@@ -234,7 +253,7 @@ async def session_websocket(
 @router.post("/{session_id}/update-students")
 async def update_session_students(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update student list for active session from Zoom
@@ -244,7 +263,7 @@ async def update_session_students(
         db: Database session
     """
     try:
-        session_manager.update_session_students(db, session_id)
+        await session_manager.update_session_students(db, session_id)
         return {"message": "Session students updated successfully"}
     except Exception as e:
         logger.error(f"Error updating session students: {e}", exc_info=True)
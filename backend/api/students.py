@@ -2,27 +2,28 @@
 API routes for student interface
 """
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database.db import get_db
 from database import models, schema
 from database.schema import UserResponse, UserCreate, QuestionMessage, ResponseCreate, ResponseMessage
 from websocket.student_ws import get_student_ws_manager
-from services.engagement_service import EngagementService
+from services.engagement_service import get_engagement_service
 import logging
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/students", tags=["students"])
 student_ws = get_student_ws_manager()
-engagement_service = EngagementService()
+engagement_service = get_engagement_service()
 
 
 @router.post("/", response_model=UserResponse)
 async def create_student(
     student: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create or get a student
@@ -35,9 +36,10 @@ async def create_student(
         Student user
     """
     # Check if student already exists
-    existing = db.query(models.User).filter(
-        models.User.student_id == student.student_id
-    ).first()
+    result = await db.execute(
+        select(models.User).where(models.User.student_id == student.student_id)
+    )
+    existing = result.scalars().first()
     
     if existing:
         return existing
@@ -45,8 +47,8 @@ async def create_student(
     # Create new student
     db_student = models.User(**student.dict())
     db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    await db.commit()
+    await db.refresh(db_student)
     
     logger.info(f"Created student {db_student.id}")
     return db_student
@@ -55,7 +57,7 @@ async def create_student(
 @router.get("/{student_id}", response_model=UserResponse)
 async def get_student(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get student by ID
@@ -67,7 +69,7 @@ async def get_student(
     Returns:
         Student details
     """
-    student = db.query(models.User).filter(models.User.id == student_id).first()
+    student = await db.get(models.User, student_id)
     
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
@@ -94,7 +96,7 @@ async def student_websocket(
     try:
         while True:
             # Receive response from student
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             
             # Handle response submission
             if data.get("type") == "response":
@@ -2,10 +2,10 @@
 API routes for Zoom integration
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database.db import get_db
-from zoom_integrator.zoom_api import ZoomAPI
+from zoom_integrator.zoom_api import get_zoom_api
 from zoom_integrator.zoom_events import get_zoom_event_handler
 from zoom_integrator.session_manager import get_session_manager
 import logging
@@ -13,7 +13,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/zoom", tags=["zoom"])
-zoom_api = ZoomAPI()
+zoom_api = get_zoom_api()
 zoom_handler = get_zoom_event_handler()
 session_manager = get_session_manager()
 
@@ -30,7 +30,7 @@ async def get_meeting_participants(meeting_id: str):
         List of participants
     """
     try:
-        participants = zoom_api.get_meeting_participants(meeting_id)
+        participants = await zoom_api.get_meeting_participants(meeting_id)
         return {"meeting_id": meeting_id, "participants": participants, "count": len(participants)}
     except Exception as e:
         logger.error(f"Error fetching meeting participants: {e}", exc_info=True)
@@ -49,7 +49,7 @@ async def get_meeting_info(meeting_id: str):
         Meeting information
     """
     try:
-        meeting_info = zoom_api.get_meeting_info(meeting_id)
+        meeting_info = await zoom_api.get_meeting_info(meeting_id)
         
         if not meeting_info:
             raise HTTPException(status_code=404, detail="Meeting not found")
@@ -65,7 +65,7 @@ async def get_meeting_info(meeting_id: str):
 @router.post("/session/{session_id}/sync-participants")
 async def sync_session_participants(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Sync participants from Zoom meeting to session
@@ -78,7 +78,7 @@ async def sync_session_participants(
         Success message
     """
     try:
-        session_manager.update_session_students(db, session_id)
+        await session_manager.update_session_students(db, session_id)
         return {"message": "Participants synchronized successfully"}
     except Exception as e:
         logger.error(f"Error syncing participants: {e}", exc_info=True)
@@ -1,10 +1,11 @@
 """
 SQLAlchemy database models for Engagement Classifier system
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, LargeBinary, CheckConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
+import hashlib
 from database.db import Base
 
 
@@ -28,6 +29,32 @@ class SessionStatus(str, enum.Enum):
     ENDED = "ended"
 
 
+def _string_enum(enum_cls) -> SQLEnum:
+    """VARCHAR(10) enum column type without per-row Python string validation"""
+    return SQLEnum(enum_cls, native_enum=False, length=10, validate_strings=False)
+
+
+def _enum_check(column: str, enum_cls) -> CheckConstraint:
+    """Table-level CHECK limiting a string enum column to the enum's stored names"""
+    names = ", ".join(f"'{member.name}'" for member in enum_cls)
+    return CheckConstraint(f"{column} IN ({names})", name=f"ck_{column}_valid")
+
+
+def normalize_answer(text: str) -> str:
+    """Normalize answer text for comparison (lowercase, surrounding whitespace removed)"""
+    return text.lower().strip()
+
+
+def hash_answer(text: str) -> bytes:
+    """8-byte BLAKE2b digest of the normalized answer text"""
+    return hashlib.blake2b(normalize_answer(text).encode(), digest_size=8).digest()
+
+
+def _default_answer_hash(context) -> bytes:
+    """Column default computing correct_answer_hash at insert time"""
+    return hash_answer(context.get_current_parameters()["correct_answer"])
+
+
 class User(Base):
     """User model for students and instructors"""
     __tablename__ = "users"
@@ -35,14 +62,18 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
-    role = Column(SQLEnum(UserRole), nullable=False)
+    role = Column(_string_enum(UserRole), nullable=False)
     student_id = Column(String(100), unique=True, index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    # Relationships
-    sessions = relationship("Session", back_populates="instructor")
-    responses = relationship("Response", back_populates="student")
-    engagement_logs = relationship("EngagementLog", back_populates="student")
+    # Relationships (lazy="raise" unless always needed: load explicitly with selectinload())
+    sessions = relationship("Session", back_populates="instructor", lazy="raise")
+    responses = relationship("Response", back_populates="student", lazy="raise")
+    engagement_logs = relationship("EngagementLog", back_populates="student", lazy="raise")
+
+    __table_args__ = (
+        _enum_check('role', UserRole),
+    )
 
 
 class Question(Base):
@@ -52,13 +83,14 @@ class Question(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     correct_answer = Column(String(500), nullable=False)
+    correct_answer_hash = Column(LargeBinary(8), default=_default_answer_hash)
     subject = Column(String(200))
     source_slide = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    generated_questions = relationship("GeneratedQuestion", back_populates="question")
-    responses = relationship("Response", back_populates="question")
+    generated_questions = relationship("GeneratedQuestion", back_populates="question", lazy="raise")
+    responses = relationship("Response", back_populates="question", lazy="raise")
 
 
 class Session(Base):
@@ -69,14 +101,18 @@ class Session(Base):
     instructor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
-    status = Column(SQLEnum(SessionStatus), default=SessionStatus.PENDING)
+    status = Column(_string_enum(SessionStatus), default=SessionStatus.PENDING)
     zoom_meeting_id = Column(String(200), nullable=True)
 
     # Relationships
-    instructor = relationship("User", back_populates="sessions")
-    generated_questions = relationship("GeneratedQuestion", back_populates="session")
-    responses = relationship("Response", back_populates="session")
-    engagement_logs = relationship("EngagementLog", back_populates="session")
+    instructor = relationship("User", back_populates="sessions", lazy="raise")
+    generated_questions = relationship("GeneratedQuestion", back_populates="session", lazy="raise")
+    responses = relationship("Response", back_populates="session", lazy="raise")
+    engagement_logs = relationship("EngagementLog", back_populates="session", lazy="raise")
+
+    __table_args__ = (
+        _enum_check('status', SessionStatus),
+    )
 
 
 class GeneratedQuestion(Base):
@@ -89,8 +125,8 @@ class GeneratedQuestion(Base):
     generated_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    question = relationship("Question", back_populates="generated_questions")
-    session = relationship("Session", back_populates="generated_questions")
+    question = relationship("Question", back_populates="generated_questions", lazy="selectin")
+    session = relationship("Session", back_populates="generated_questions", lazy="raise")
 
 
 class Response(Base):
@@ -107,9 +143,14 @@ class Response(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    student = relationship("User", back_populates="responses")
-    question = relationship("Question", back_populates="responses")
-    session = relationship("Session", back_populates="responses")
+    student = relationship("User", back_populates="responses", lazy="raise")
+    question = relationship("Question", back_populates="responses", lazy="raise")
+    session = relationship("Session", back_populates="responses", lazy="raise")
+
+    __table_args__ = (
+        Index('ix_response_student_session_ts', 'student_id', 'session_id', 'timestamp'),
+        Index('ix_response_session_ts', 'session_id', 'timestamp'),
+    )
 
 
 class EngagementLog(Base):
@@ -118,11 +159,20 @@ class EngagementLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    engagement_level = Column(SQLEnum(EngagementLevel), nullable=False)
+    engagement_level = Column(_string_enum(EngagementLevel), nullable=False)
     session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    student = relationship("User", back_populates="engagement_logs")
-    session = relationship("Session", back_populates="engagement_logs")
+    student = relationship("User", back_populates="engagement_logs", lazy="raise")
+    session = relationship("Session", back_populates="engagement_logs", lazy="raise")
+
+    __table_args__ = (
+        Index(
+            'ix_engagementlog_session_student_ts',
+            session_id, student_id, timestamp.desc(),
+            postgresql_include=['engagement_level']
+        ),
+        _enum_check('engagement_level', EngagementLevel),
+    )
 
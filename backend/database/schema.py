@@ -1,7 +1,7 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List
 from datetime import datetime
 from database.models import UserRole, EngagementLevel, SessionStatus
@@ -23,8 +23,7 @@ class UserResponse(UserBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Question Schemas
@@ -43,8 +42,15 @@ class QuestionResponse(QuestionBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class QuestionListItem(BaseModel):
+    id: int
+    text: str
+    subject: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Session Schemas
@@ -65,8 +71,7 @@ class SessionResponse(BaseModel):
     status: SessionStatus
     zoom_meeting_id: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Response Schemas
@@ -88,8 +93,7 @@ class ResponseResponse(BaseModel):
     is_correct: bool
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Engagement Schemas
@@ -100,8 +104,7 @@ class EngagementLogResponse(BaseModel):
     session_id: int
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class EngagementUpdate(BaseModel):
@@ -118,6 +121,8 @@ class DashboardStats(BaseModel):
     total_questions: int
     total_responses: int
 
+    model_config = ConfigDict(frozen=True)
+
 
 class StudentEngagementStatus(BaseModel):
     student_id: int
@@ -128,12 +133,16 @@ class StudentEngagementStatus(BaseModel):
     correct_count: int
     avg_response_time: float
 
+    model_config = ConfigDict(frozen=True)
+
 
 class SessionDetails(BaseModel):
     session: SessionResponse
     stats: DashboardStats
     students: List[StudentEngagementStatus]
 
+    model_config = ConfigDict(frozen=True)
+
 
 # WebSocket Schemas
 class QuestionMessage(BaseModel):
@@ -143,6 +152,8 @@ class QuestionMessage(BaseModel):
     question_subject: Optional[str]
     session_id: int
 
+    model_config = ConfigDict(frozen=True)
+
 
 class ResponseMessage(BaseModel):
     type: str = "response"
@@ -150,15 +161,21 @@ class ResponseMessage(BaseModel):
     question_id: int
     is_correct: bool
 
+    model_config = ConfigDict(frozen=True)
+
 
 class EngagementMessage(BaseModel):
     type: str = "engagement"
     student_id: int
     engagement_level: EngagementLevel
 
+    model_config = ConfigDict(frozen=True)
+
 
 class DashboardUpdate(BaseModel):
     type: str = "dashboard_update"
     stats: DashboardStats
     students: List[StudentEngagementStatus]
 
+    model_config = ConfigDict(frozen=True)
+
@@ -4,8 +4,18 @@ This will be replaced with ML model in production
 """
 from typing import Dict
 from engagement_classifier.model import EngagementClassifierModel
+from engagement_classifier.preprocess import _LABELS
 from database.models import EngagementLevel
 
+# Level codes used by the rules classifier: 0=PASSIVE, 1=MODERATE, 2=ACTIVE
+_LEVELS = (EngagementLevel.PASSIVE, EngagementLevel.MODERATE, EngagementLevel.ACTIVE)
+
+# Model prediction (label, or class index in model output order) -> EngagementLevel
+_PRED_TO_LEVEL = {
+    **{label: EngagementLevel(label) for label in _LABELS},
+    **{index: EngagementLevel(label) for index, label in enumerate(_LABELS)}
+}
+
 
 class EngagementClassifier:
     """
@@ -67,16 +77,10 @@ class EngagementClassifier:
         Returns:
             EngagementLevel
         """
-        # Check for ACTIVE engagement
-        if response_time_ms < 4000 and is_correct:
-            return EngagementLevel.ACTIVE
-        
-        # Check for PASSIVE engagement
-        if response_time_ms > 7000 or not is_correct:
-            return EngagementLevel.PASSIVE
-        
-        # Otherwise MODERATE
-        return EngagementLevel.MODERATE
+        # Wrong answers are always PASSIVE (code 0); correct answers start at
+        # MODERATE and move up for fast responses or down for slow ones
+        code = bool(is_correct) * (1 + (response_time_ms < 4000) - (response_time_ms > 7000))
+        return _LEVELS[code]
     
     def _classify_with_ml(
         self,
@@ -106,7 +110,7 @@ class EngagementClassifier:
         prediction = self.ml_model.predict(features)
         
         # Convert to EngagementLevel enum
-        return EngagementLevel[prediction.upper()]
+        return _PRED_TO_LEVEL[prediction]
 
 
 def create_classifier(use_ml: bool = False, model_path: str = None) -> EngagementClassifier:
@@ -122,3 +126,11 @@ def create_classifier(use_ml: bool = False, model_path: str = None) -> Engagemen
     """
     return EngagementClassifier(use_ml_model=use_ml, model_path=model_path)
 
+
+# Global rules-based classifier instance
+_classifier = create_classifier(use_ml=False)
+
+
+def get_classifier() -> EngagementClassifier:
+    """Get the shared rules-based engagement classifier"""
+    return _classifier
@@ -2,7 +2,7 @@
 Model placeholder for future deep learning engagement classifier
 This file will contain the actual model loading logic when ML is integrated
 """
-from typing import Any, Optional
+from typing import Any, Optional, Union
 import numpy as np
 
 
@@ -43,7 +43,7 @@ class EngagementClassifierModel:
         print("WARNING: Using placeholder model. Actual ML model not yet loaded.")
         self.is_loaded = False
     
-    def predict(self, features: np.ndarray) -> str:
+    def predict(self, features: np.ndarray) -> Union[int, str]:
         """
         Predict engagement level from features
         
@@ -51,7 +51,9 @@ class EngagementClassifierModel:
             features: Array of student features (response_time, is_correct, etc.)
         
         Returns:
-            Predicted engagement level: "active", "moderate", or "passive"
+            Predicted class index in model output order (0=active,
+            1=moderate, 2=passive), or the level label "active",
+            "moderate", or "passive"
         """
         if not self.is_loaded or self.model is None:
             raise RuntimeError("Model not loaded. Use rules-based classifier.")
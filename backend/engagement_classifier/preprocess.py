@@ -2,11 +2,33 @@
 Data preprocessing for engagement classification
 Prepares student data for model input
 """
+from dataclasses import dataclass
 from typing import Dict, List
 import numpy as np
 
+# Normalization lower bounds and ranges, in feature order:
+# response_time, is_correct, question_difficulty, attempt_count, avg_response_time
+_MIN = np.array([0, 0, 0, 0, 0], dtype=np.float32)
+_RANGE = np.array([10000, 1, 1, 10, 10000], dtype=np.float32)
 
-def extract_features(data: Dict) -> Dict:
+# Engagement labels in model output order
+_LABELS = ("active", "moderate", "passive")
+_LABEL_ARRAY = np.array(_LABELS)
+
+
+@dataclass(frozen=True)
+class StudentFeatures:
+    """Raw (unnormalized) model features for a single student"""
+    __slots__ = ("response_time", "is_correct", "question_difficulty", "attempt_count", "avg_response_time")
+    
+    response_time: float
+    is_correct: float
+    question_difficulty: float
+    attempt_count: float
+    avg_response_time: float
+
+
+def extract_features(data: Dict) -> StudentFeatures:
     """
     Extract relevant features from raw student data
     
@@ -21,46 +43,34 @@ def extract_features(data: Dict) -> Dict:
             }
     
     Returns:
-        Dictionary of extracted features
+        StudentFeatures
     """
-    features = {
-        'response_time': data.get('response_time_ms', 0),
-        'is_correct': 1.0 if data.get('is_correct', False) else 0.0,
-        'question_difficulty': data.get('question_difficulty', 0.5),
-        'attempt_count': data.get('attempt_count', 1),
-        'avg_response_time': data.get('avg_response_time', 5000.0)
-    }
-    
-    return features
+    return StudentFeatures(
+        response_time=data.get('response_time_ms', 0),
+        is_correct=1.0 if data.get('is_correct', False) else 0.0,
+        question_difficulty=data.get('question_difficulty', 0.5),
+        attempt_count=data.get('attempt_count', 1),
+        avg_response_time=data.get('avg_response_time', 5000.0)
+    )
 
 
-def normalize_features(features: Dict) -> np.ndarray:
+def normalize_features(features: StudentFeatures) -> np.ndarray:
     """
     Normalize features to [0, 1] range for model input
     
     Args:
-        features: Dictionary of feature values
+        features: Extracted student features
     
     Returns:
-        Normalized numpy array
+        Normalized numpy array (same bounds as _MIN/_RANGE)
     """
-    # Define normalization ranges for each feature
-    normalization_params = {
-        'response_time': (0, 10000),  # 0-10 seconds
-        'is_correct': (0, 1),
-        'question_difficulty': (0, 1),
-        'attempt_count': (0, 10),
-        'avg_response_time': (0, 10000)
-    }
-    
-    normalized = []
-    for key, (min_val, max_val) in normalization_params.items():
-        value = features.get(key, 0)
-        norm_value = (value - min_val) / (max_val - min_val)
-        norm_value = max(0, min(1, norm_value))  # Clip to [0, 1]
-        normalized.append(norm_value)
-    
-    return np.array(normalized)
+    return np.array([
+        features.response_time / 10000.0,  # 0-10 seconds
+        features.is_correct,
+        features.question_difficulty,
+        features.attempt_count / 10.0,
+        features.avg_response_time / 10000.0
+    ], dtype=np.float32).clip(0, 1)
 
 
 def prepare_batch(students_data: List[Dict]) -> np.ndarray:
@@ -73,13 +83,21 @@ def prepare_batch(students_data: List[Dict]) -> np.ndarray:
     Returns:
         Batch numpy array of shape (num_students, num_features)
     """
-    batch = []
-    for student_data in students_data:
-        features = extract_features(student_data)
-        normalized = normalize_features(features)
-        batch.append(normalized)
+    if not students_data:
+        return np.empty((0, len(_RANGE)), dtype=np.float32)
+    
+    batch = np.asarray([
+        [d.get('response_time_ms', 0) for d in students_data],
+        [1.0 if d.get('is_correct', False) else 0.0 for d in students_data],
+        [d.get('question_difficulty', 0.5) for d in students_data],
+        [d.get('attempt_count', 1) for d in students_data],
+        [d.get('avg_response_time', 5000.0) for d in students_data]
+    ], dtype=np.float32).T.copy()
     
-    return np.array(batch)
+    np.subtract(batch, _MIN, out=batch)
+    np.divide(batch, _RANGE, out=batch)
+    np.clip(batch, 0, 1, out=batch)
+    return batch
 
 
 def interpret_prediction(prediction: np.ndarray) -> str:
@@ -95,15 +113,8 @@ def interpret_prediction(prediction: np.ndarray) -> str:
     # Handle different prediction formats
     if len(prediction.shape) == 2:
         # Multiple predictions (batch)
-        engagement_levels = []
-        for pred in prediction:
-            idx = np.argmax(pred)
-            level = ["active", "moderate", "passive"][idx]
-            engagement_levels.append(level)
-        return engagement_levels
+        return _LABEL_ARRAY[np.argmax(prediction, axis=1)].tolist()
     else:
         # Single prediction
-        idx = np.argmax(prediction)
-        level = ["active", "moderate", "passive"][idx]
-        return level
+        return _LABELS[int(np.argmax(prediction))]
 
@@ -1,17 +1,23 @@
 """
 Main FastAPI application entry point
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from api import questions, engagement, sessions, responses, zoom, students
-from database.db import init_db, engine, Base
+from database.db import init_db, warm_pool, check_db, engine, Base, SessionLocal
 from services.adaptive_engine import get_adaptive_engine
+from services.engagement_service import get_engagement_service
+from services.text_extractor import start_extractor_pool, shutdown_extractor_pool
 from websocket.student_ws import get_student_ws_manager
 from websocket.instructor_ws import get_instructor_ws_manager
 from zoom_integrator.zoom_events import get_zoom_event_handler
-from sqlalchemy.orm import Session
+from zoom_integrator.zoom_api import get_zoom_api
+from zoom_integrator.session_manager import get_session_manager
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
 # Configure logging
@@ -30,16 +36,22 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Initializing database...")
-    init_db()
+    await init_db()
+    
+    logger.info("Warming database connection pool...")
+    await warm_pool()
+    
+    logger.info("Starting engagement writer...")
+    engagement_service = get_engagement_service()
+    engagement_service.start_writer()
+    
+    logger.info("Starting text extractor pool...")
+    start_extractor_pool()
     
     logger.info("Initializing adaptive engine...")
     adaptive_engine = get_adaptive_engine()
     
     # Initialize adaptive engine with dependencies
-    def get_db_session():
-        from database.db import SessionLocal
-        return SessionLocal()
-    
     async def question_push_callback(session_id: int, student_ids: list):
         """
         Callback for adaptive engine to push questions to students
@@ -53,16 +65,36 @@ async def lifespan(app: FastAPI):
         # TODO: Get question from pool and send to students
         # For now, just log the action
     
-    adaptive_engine.initialize(get_db_session, question_push_callback)
+    adaptive_engine.initialize(SessionLocal, question_push_callback)
     adaptive_engine.start()
     
+    zoom_handler = get_zoom_event_handler()
+    zoom_monitor = None
+    if get_zoom_api().is_configured:
+        logger.info("Starting Zoom participant monitor...")
+        zoom_monitor = asyncio.create_task(
+            zoom_handler.monitor_all(get_session_manager().on_zoom_participants)
+        )
+    else:
+        logger.info("Zoom credentials not configured, participant monitor disabled")
+    
     logger.info("Application started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down adaptive engine...")
-    adaptive_engine.stop()
+    await adaptive_engine.stop()
+    zoom_handler.stop_monitoring_all()
+    if zoom_monitor is not None:
+        zoom_monitor.cancel()
+        try:
+            await zoom_monitor
+        except asyncio.CancelledError:
+            pass
+    await engagement_service.stop_writer()
+    shutdown_extractor_pool()
+    await get_zoom_api().aclose()
     logger.info("Application shutdown complete")
 
 
@@ -71,16 +103,19 @@ app = FastAPI(
     title="Engagement Classifier API",
     description="Real-Time Engagement Monitoring & Adaptive Question Delivery System",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# Configure CORS
+# Configure CORS (set CORS_ORIGIN_REGEX to the frontend origin in production)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origin_regex=os.getenv("CORS_ORIGIN_REGEX", ".*"),
+    allow_credentials=False,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["authorization", "content-type", "if-none-match"],
+    expose_headers=["ETag"],
+    max_age=86400,
 )
 
 # Include routers
@@ -109,6 +144,18 @@ async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
 
+@app.get("/health/db")
+async def db_health_check():
+    """Database health check; reports connection pool saturation"""
+    try:
+        pool_status = await check_db()
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    
+    return {"status": "healthy", "pool": pool_status}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
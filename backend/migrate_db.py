@@ -0,0 +1,90 @@
+"""
+Database upgrade script
+Run this once against a database created before the current schema;
+init_db/create_all only creates missing tables and never alters existing ones.
+Every step is idempotent, so re-running it is safe.
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from database.db import engine
+from database.models import hash_answer, UserRole, SessionStatus, EngagementLevel
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Enum columns move from native Postgres enum types to VARCHAR(10) + CHECK;
+# both store the member names, so the cast keeps existing values
+_ENUM_COLUMNS = [
+    ("users", "role", "userrole", UserRole),
+    ("sessions", "status", "sessionstatus", SessionStatus),
+    ("engagement_logs", "engagement_level", "engagementlevel", EngagementLevel),
+]
+
+_INDEX_STATEMENTS = [
+    "DROP INDEX IF EXISTS ix_engagementlog_student_session_ts",
+    "CREATE INDEX IF NOT EXISTS ix_engagementlog_session_student_ts "
+    "ON engagement_logs (session_id, student_id, timestamp DESC) INCLUDE (engagement_level)",
+    "CREATE INDEX IF NOT EXISTS ix_response_student_session_ts "
+    "ON responses (student_id, session_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS ix_response_session_ts ON responses (session_id, timestamp)",
+]
+
+
+async def upgrade():
+    """Bring an existing database up to the current models"""
+    async with engine.begin() as conn:
+        # Question answer hash (backfilled below)
+        await conn.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS correct_answer_hash BYTEA"))
+        await conn.execute(text("ALTER TABLE questions DROP COLUMN IF EXISTS correct_answer_norm"))
+        
+        for table, column, enum_type, enum_cls in _ENUM_COLUMNS:
+            names = ", ".join(f"'{member.name}'" for member in enum_cls)
+            await conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE VARCHAR(10) USING {column}::text"
+            ))
+            await conn.execute(text(f"DROP TYPE IF EXISTS {enum_type}"))
+            await conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS ck_{column}_valid"))
+            await conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT ck_{column}_valid "
+                f"CHECK ({column} IN ({names}))"
+            ))
+        
+        for statement in _INDEX_STATEMENTS:
+            await conn.execute(text(statement))
+        
+        # Backfill hashes in Python so they match hash_answer exactly
+        result = await conn.execute(text(
+            "SELECT id, correct_answer FROM questions WHERE correct_answer_hash IS NULL"
+        ))
+        rows = [
+            {"question_id": row.id, "answer_hash": hash_answer(row.correct_answer)}
+            for row in result
+        ]
+        if rows:
+            await conn.execute(
+                text("UPDATE questions SET correct_answer_hash = :answer_hash WHERE id = :question_id"),
+                rows
+            )
+        logger.info(f"Backfilled answer hashes for {len(rows)} questions")
+
+
+def main():
+    """Upgrade database schema"""
+    logger.info("Upgrading database...")
+    try:
+        asyncio.run(upgrade())
+        logger.info("Database upgraded successfully!")
+    except Exception as e:
+        logger.error(f"Error upgrading database: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,100 @@
 Adaptive interaction engine for dynamic question delivery
 Monitors student engagement and adjusts question frequency
 """
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
 from typing import Dict, Set, Callable, Optional
 from database import models, schema
-from .engagement_service import EngagementService
+from database.db import SessionLocal
+from .engagement_service import get_engagement_service
 from datetime import datetime
+import numpy as np
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Per-session monitoring intervals (seconds), chosen from the session's engagement mix
+MONITOR_INTERVAL_PASSIVE = 5.0
+MONITOR_INTERVAL_DEFAULT = 10.0
+MONITOR_INTERVAL_ACTIVE = 60.0
+
+# Upper bound on sessions evaluated/pushing questions at the same time
+MAX_CONCURRENT_SESSION_TICKS = 10
+
+# int8 engagement codes stored per student
+UNKNOWN_CODE = -1
+PASSIVE_CODE = 0
+MODERATE_CODE = 1
+ACTIVE_CODE = 2
+
+_LEVEL_CODES = {
+    models.EngagementLevel.PASSIVE: PASSIVE_CODE,
+    models.EngagementLevel.MODERATE: MODERATE_CODE,
+    models.EngagementLevel.ACTIVE: ACTIVE_CODE
+}
+
+# Minimum seconds between questions for a student, indexed by engagement code + 1:
+# unknown (deliver an initial question), passive, moderate, active
+_POLICY = np.array([0.0, 10.0, 30.0, 120.0])
+
+
+class SessionEngagement:
+    """
+    Struct-of-arrays engagement state for the students of one session
+    
+    student_ids is sorted; engagement[i] holds the int8 code for student_ids[i]
+    and last_sent[i] the monotonic time a question was last pushed to them.
+    """
+    
+    __slots__ = ("student_ids", "engagement", "last_sent", "_index")
+    
+    def __init__(self, student_ids: Set[int], previous: Optional["SessionEngagement"] = None):
+        """
+        Build arrays for a roster, carrying over known levels from a previous roster
+        
+        Args:
+            student_ids: Set of student IDs in session
+            previous: Earlier state for the same session, if any
+        """
+        self.student_ids = np.array(sorted(student_ids), dtype=np.int64)
+        self.engagement = np.full(len(self.student_ids), UNKNOWN_CODE, dtype=np.int8)
+        self.last_sent = np.full(len(self.student_ids), -np.inf)
+        self._index = {sid: i for i, sid in enumerate(self.student_ids.tolist())}
+        
+        if previous is not None and len(previous.student_ids) and len(self.student_ids):
+            pos = np.searchsorted(previous.student_ids, self.student_ids)
+            pos = np.minimum(pos, len(previous.student_ids) - 1)
+            kept = previous.student_ids[pos] == self.student_ids
+            self.engagement[kept] = previous.engagement[pos[kept]]
+            self.last_sent[kept] = previous.last_sent[pos[kept]]
+    
+    def set_level(self, student_id: int, level: models.EngagementLevel):
+        """Record a new engagement level for a student on the roster"""
+        i = self._index.get(student_id)
+        if i is not None:
+            self.engagement[i] = _LEVEL_CODES[level]
+    
+    def seed(self, levels: Dict[int, models.EngagementLevel]):
+        """Fill in levels only for students whose engagement is still unknown"""
+        for student_id, level in levels.items():
+            i = self._index.get(student_id)
+            if i is not None and self.engagement[i] == UNKNOWN_CODE:
+                self.engagement[i] = _LEVEL_CODES[level]
+    
+    def due_for_question(self, now: float) -> np.ndarray:
+        """
+        Mark and return students whose engagement-based question interval has elapsed
+        
+        Args:
+            now: Current monotonic time
+        
+        Returns:
+            Student IDs that should receive a question
+        """
+        mask = (now - self.last_sent) >= _POLICY[self.engagement + 1]
+        self.last_sent[mask] = now
+        return self.student_ids[mask]
+
 
 class AdaptiveEngine:
     """
@@ -20,12 +103,17 @@ class AdaptiveEngine:
     """
     
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
-        self.engagement_service = EngagementService()
+        self.engagement_service = get_engagement_service()
         self.active_sessions: Dict[int, Set[int]] = {}  # session_id -> set of student_ids
+        # session_id -> latest engagement per student, kept current by engagement service events
+        self._engagement: Dict[int, SessionEngagement] = {}
+        self._sessions_to_warm: Set[int] = set()
+        self._tasks: Dict[int, asyncio.Task] = {}  # session_id -> monitoring task
+        self._tick_semaphore: Optional[asyncio.Semaphore] = None
         self.question_push_callback: Optional[Callable] = None
-        self.db_session_factory: Optional[Callable] = None
+        self.db_session_factory: Callable = SessionLocal
         self._running = False
+        self.engagement_service.add_listener(self._on_engagement_logged)
     
     def initialize(
         self,
@@ -36,7 +124,7 @@ class AdaptiveEngine:
         Initialize engine with dependencies
         
         Args:
-            db_session_factory: Function to create database sessions
+            db_session_factory: Session maker used for database access (e.g. SessionLocal)
             question_push_callback: Function to call when pushing questions to students
                 Signature: callback(session_id: int, student_ids: List[int]) -> None
         """
@@ -49,25 +137,26 @@ class AdaptiveEngine:
             logger.warning("Adaptive engine already running")
             return
         
-        # Schedule engagement monitoring every 10 seconds
-        self.scheduler.add_job(
-            self._monitor_engagement,
-            IntervalTrigger(seconds=10),
-            id='monitor_engagement',
-            replace_existing=True
-        )
-        
-        self.scheduler.start()
+        self._tick_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SESSION_TICKS)
         self._running = True
+        
+        # Sessions added before start get their monitoring tasks now
+        for session_id in self.active_sessions:
+            self._start_session_task(session_id)
+        
         logger.info("Adaptive interaction engine started")
     
-    def stop(self):
+    async def stop(self):
         """Stop the adaptive engine"""
         if not self._running:
             return
         
-        self.scheduler.shutdown()
         self._running = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         logger.info("Adaptive interaction engine stopped")
     
     def add_session(self, session_id: int, student_ids: Set[int]):
@@ -79,6 +168,10 @@ class AdaptiveEngine:
             student_ids: Set of student IDs in session
         """
         self.active_sessions[session_id] = student_ids
+        self._engagement[session_id] = SessionEngagement(student_ids)
+        self._sessions_to_warm.add(session_id)
+        if self._running:
+            self._start_session_task(session_id)
         logger.info(f"Added session {session_id} with {len(student_ids)} students")
     
     def remove_session(self, session_id: int):
@@ -90,6 +183,11 @@ class AdaptiveEngine:
         """
         if session_id in self.active_sessions:
             del self.active_sessions[session_id]
+            self._engagement.pop(session_id, None)
+            self._sessions_to_warm.discard(session_id)
+            task = self._tasks.pop(session_id, None)
+            if task is not None:
+                task.cancel()
             logger.info(f"Removed session {session_id}")
     
     def update_session_students(self, session_id: int, student_ids: Set[int]):
@@ -101,114 +199,156 @@ class AdaptiveEngine:
             student_ids: Set of student IDs
         """
         if session_id in self.active_sessions:
+            if student_ids - self.active_sessions[session_id]:
+                # Newly joined students may already have history in the database
+                self._sessions_to_warm.add(session_id)
             self.active_sessions[session_id] = student_ids
+            self._engagement[session_id] = SessionEngagement(
+                student_ids, self._engagement.get(session_id)
+            )
     
-    async def _monitor_engagement(self):
+    def _on_engagement_logged(
+        self,
+        session_id: int,
+        student_id: int,
+        engagement_level: models.EngagementLevel
+    ):
         """
-        Monitor engagement for all active sessions and trigger questions
-        This runs every 10 seconds
+        Engagement service listener that keeps the in-memory state current
+        
+        Args:
+            session_id: Session ID
+            student_id: Student ID
+            engagement_level: Newly logged engagement level
         """
-        if not self.db_session_factory or not self.question_push_callback:
-            logger.error("Adaptive engine not properly initialized")
-            return
+        state = self._engagement.get(session_id)
+        if state is not None:
+            state.set_level(student_id, engagement_level)
+    
+    def _start_session_task(self, session_id: int):
+        """Spawn the monitoring task for a session if it is not already running"""
+        if session_id not in self._tasks:
+            self._tasks[session_id] = asyncio.create_task(self._session_loop(session_id))
+    
+    def _interval_for(self, session_id: int) -> float:
+        """
+        Pick the next monitoring interval from the session's cached engagement mix
         
-        db = self.db_session_factory()
+        Args:
+            session_id: Session ID
+        
+        Returns:
+            Seconds to sleep before the next tick
+        """
+        state = self._engagement.get(session_id)
+        if state is None or not len(state.engagement):
+            return MONITOR_INTERVAL_DEFAULT
+        
+        if (state.engagement == PASSIVE_CODE).any():
+            return MONITOR_INTERVAL_PASSIVE
+        if (state.engagement == ACTIVE_CODE).all():
+            return MONITOR_INTERVAL_ACTIVE
+        return MONITOR_INTERVAL_DEFAULT
+    
+    async def _session_loop(self, session_id: int):
+        """
+        Monitor a single session until it is removed or the engine stops
+        
+        Failed ticks back off exponentially, up to the ACTIVE interval.
+        
+        Args:
+            session_id: Session ID
+        """
+        failures = 0
+        while session_id in self.active_sessions:
+            try:
+                async with self._tick_semaphore:
+                    await self._monitor_session(session_id)
+                failures = 0
+                interval = self._interval_for(session_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                interval = min(MONITOR_INTERVAL_DEFAULT * 2 ** failures, MONITOR_INTERVAL_ACTIVE)
+                logger.error(f"Error monitoring session {session_id}: {e}", exc_info=True)
+            
+            await asyncio.sleep(interval)
+    
+    async def _warm_session_cache(self, session_id: int):
+        """
+        Seed a session's engagement cache from the database
+        
+        Values already pushed by the engagement service are newer than the
+        database and are kept.
+        
+        Args:
+            session_id: Session ID
+        """
+        self._sessions_to_warm.discard(session_id)
+        student_ids = self.active_sessions[session_id]
+        if not student_ids:
+            return
         
         try:
-            for session_id, student_ids in list(self.active_sessions.items()):
-                students_needing_questions = self._identify_students_needing_questions(
+            async with self.db_session_factory() as db:
+                latest = await self.engagement_service.get_current_engagement_bulk(
                     db, session_id, student_ids
                 )
-                
-                if students_needing_questions:
-                    logger.info(
-                        f"Session {session_id}: {len(students_needing_questions)} students need questions"
-                    )
-                    await self.question_push_callback(session_id, students_needing_questions)
-        except Exception as e:
-            logger.error(f"Error in engagement monitoring: {e}", exc_info=True)
-        finally:
-            db.close()
-    
-    def _identify_students_needing_questions(
-        self,
-        db: Session,
-        session_id: int,
-        student_ids: Set[int]
-    ) -> Set[int]:
+        except Exception:
+            self._sessions_to_warm.add(session_id)
+            raise
+        
+        state = self._engagement.get(session_id)
+        if state is not None:
+            state.seed(latest)
+    
+    async def _monitor_session(self, session_id: int):
         """
-        Identify which students need questions based on engagement
+        Check engagement for one session and trigger questions
         
         Args:
-            db: Database session
             session_id: Session ID
-            student_ids: Set of student IDs
-        
-        Returns:
-            Set of student IDs that need questions
         """
-        students_needing_questions = set()
+        if not self.question_push_callback:
+            logger.error("Adaptive engine not properly initialized")
+            return
         
-        for student_id in student_ids:
-            engagement = self.engagement_service.get_current_engagement(
-                db, student_id, session_id
-            )
-            
-            should_get_question = self._should_deliver_question(
-                engagement, student_id, session_id
-            )
-            
-            if should_get_question:
-                students_needing_questions.add(student_id)
+        if session_id not in self.active_sessions:
+            return
+        
+        if session_id in self._sessions_to_warm:
+            await self._warm_session_cache(session_id)
+        
+        students_needing_questions = self._identify_students_needing_questions(session_id)
         
-        return students_needing_questions
+        if students_needing_questions:
+            logger.info(
+                f"Session {session_id}: {len(students_needing_questions)} students need questions"
+            )
+            await self.question_push_callback(session_id, students_needing_questions)
     
-    def _should_deliver_question(
-        self,
-        engagement: Optional[models.EngagementLevel],
-        student_id: int,
-        session_id: int
-    ) -> bool:
+    def _identify_students_needing_questions(self, session_id: int) -> Set[int]:
         """
-        Determine if a student should receive a question based on engagement
+        Identify which students need questions based on engagement
         
-        Logic:
-        - PASSIVE students: high frequency (every monitoring cycle if eligible)
-        - MODERATE students: medium frequency
-        - ACTIVE students: low frequency
-        - No engagement data: default to moderate frequency
+        Logic (minimum interval per student, see _POLICY):
+        - PASSIVE students: high frequency (every 10 seconds)
+        - MODERATE students: medium frequency (every 30 seconds)
+        - ACTIVE students: low frequency (every 2 minutes)
+        - No engagement data: deliver an initial question
         
         Args:
-            engagement: Current engagement level
-            student_id: Student ID
             session_id: Session ID
         
         Returns:
-            True if student should receive question
-        """
-        # Check last question time for this student to implement frequency control
-        # For now, simple logic based on engagement
-        
-        if engagement is None:
-            # No engagement data yet, deliver initial question
-            return True
-        
-        # Simple rules-based frequency control
-        # In production, implement time-based throttling
-        
-        if engagement == models.EngagementLevel.PASSIVE:
-            # Passives get questions more frequently
-            return True  # Simplified: always deliver for passive
-        elif engagement == models.EngagementLevel.MODERATE:
-            # Moderates get medium frequency
-            # TODO: Add time-based throttling (e.g., max once per 30 seconds)
-            return True
-        elif engagement == models.EngagementLevel.ACTIVE:
-            # Actives get low frequency
-            # TODO: Add time-based throttling (e.g., max once per 2 minutes)
-            return False
-        
-        return False
+            Set of student IDs that need questions
+        """
+        state = self._engagement.get(session_id)
+        if state is None:
+            return set()
+        
+        return set(state.due_for_question(time.monotonic()).tolist())
 
 
 # Global engine instance
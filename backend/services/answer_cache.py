@@ -0,0 +1,65 @@
+"""
+In-process cache of correct-answer hashes for response checking
+"""
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """TTL cache mapping question ID to the hash of its normalized correct answer"""
+    
+    def __init__(self, maxsize: int = 10_000, ttl: int = 300):
+        self._answers: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    async def get_correct_answer_hash(self, db: AsyncSession, question_id: int) -> Optional[bytes]:
+        """
+        Get correct-answer hash for a question, querying on cache miss
+        
+        Args:
+            db: Database session
+            question_id: Question ID
+        
+        Returns:
+            8-byte answer hash, or None if the question does not exist
+        """
+        answer_hash = self._answers.get(question_id)
+        if answer_hash is not None:
+            return answer_hash
+        
+        result = await db.execute(
+            select(models.Question.correct_answer, models.Question.correct_answer_hash)
+            .where(models.Question.id == question_id)
+        )
+        row = result.one_or_none()
+        
+        if row is None:
+            return None
+        
+        # Rows created before the hash column existed are hashed on the fly
+        answer_hash = row.correct_answer_hash or models.hash_answer(row.correct_answer)
+        self._answers[question_id] = answer_hash
+        return answer_hash
+    
+    def invalidate(self, question_id: int):
+        """
+        Drop a cached answer after the question changes or is deleted
+        
+        Args:
+            question_id: Question ID
+        """
+        self._answers.pop(question_id, None)
+
+
+# Global answer cache
+_answer_cache = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get the global answer cache"""
+    return _answer_cache
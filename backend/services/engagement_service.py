@@ -1,21 +1,196 @@
 """
 Engagement service for tracking and updating student engagement
 """
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from cachetools import TTLCache
+from collections import Counter
+from sqlalchemy import select, insert, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, List, Dict, Optional, Set
 from database import models, schema
-from engagement_classifier.classifier import create_classifier
+from database.db import SessionLocal
+from engagement_classifier.classifier import get_classifier
 from datetime import datetime
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Background engagement writer: flush up to this many queued logs at once,
+# waiting at most this long (seconds) to fill a batch
+ENGAGEMENT_BATCH_SIZE = 100
+ENGAGEMENT_FLUSH_INTERVAL = 0.05
+ENGAGEMENT_QUEUE_SIZE = 10_000
+
+# Seconds the latest engagement log per (session, student) is served from
+# memory; new writes for that student drop the entry immediately
+ENGAGEMENT_LATEST_TTL = 5
+
+# Seconds a session's level counter is trusted before it is reseeded from
+# the database; bounds drift from writes made by other workers/processes
+ENGAGEMENT_COUNTER_TTL = 10
+
+# Per-student engagement lookups; built once with bound parameters so
+# every call reuses the same compiled-cache entry
+_student_session_logs = (
+    select(models.EngagementLog)
+    .where(
+        models.EngagementLog.student_id == bindparam("student_id"),
+        models.EngagementLog.session_id == bindparam("session_id")
+    )
+    .order_by(models.EngagementLog.timestamp.desc())
+)
+_latest_engagement_stmt = _student_session_logs.limit(1)
+_engagement_history_stmt = _student_session_logs.limit(bindparam("limit"))
+
+
+def latest_engagement_stmt(session_id: int, student_ids=None):
+    """
+    Build a single-statement "latest engagement per student" query
+    
+    Uses Postgres DISTINCT ON, which walks the (student_id, session_id,
+    timestamp) index once instead of issuing one ORDER BY ... LIMIT 1
+    query per student.
+    
+    Args:
+        session_id: Session ID
+        student_ids: Optional list of student IDs (or subquery) to restrict to
+    
+    Returns:
+        Select yielding (student_id, engagement_level) rows
+    """
+    conditions = [models.EngagementLog.session_id == session_id]
+    
+    if student_ids is not None:
+        conditions.append(models.EngagementLog.student_id.in_(student_ids))
+    
+    return (
+        select(models.EngagementLog.student_id, models.EngagementLog.engagement_level)
+        .distinct(models.EngagementLog.student_id)
+        .where(*conditions)
+        .order_by(models.EngagementLog.student_id, models.EngagementLog.timestamp.desc())
+    )
+
+
+# Latest engagement for a roster, built once: only :session_id and the
+# expanding :student_ids list change between adaptive engine lookups
+_roster_latest_engagement_stmt = latest_engagement_stmt(
+    bindparam("session_id"), bindparam("student_ids", expanding=True)
+)
+
+
+# Queued by stop_writer behind all pending logs to end the writer loop
+_STOP_WRITER = object()
+
+
+def _closes_batch(item) -> bool:
+    """Whether a queue item must end the writer's current batch"""
+    return item is _STOP_WRITER or isinstance(item, asyncio.Future)
+
+
+class SessionLevelCounter:
+    """Latest engagement level per student in a session, with running per-level counts"""
+    
+    __slots__ = ("levels", "counts", "seeded")
+    
+    def __init__(self):
+        self.levels: Dict[int, models.EngagementLevel] = {}
+        self.counts: Counter = Counter()
+        self.seeded = False
+    
+    def record(self, student_id: int, level: models.EngagementLevel):
+        """Move a student to a new latest level, adjusting the counts"""
+        previous = self.levels.get(student_id)
+        if previous == level:
+            return
+        
+        self.levels[student_id] = level
+        if previous is not None:
+            self.counts[previous] -= 1
+        self.counts[level] += 1
+    
+    def seed(self, rows):
+        """
+        Fill in levels loaded from the database
+        
+        Levels recorded by writes since the counter was created are newer than
+        the query snapshot and are kept.
+        
+        Args:
+            rows: (student_id, engagement_level) rows
+        """
+        for student_id, level in rows:
+            if student_id not in self.levels:
+                self.record(student_id, level)
+        self.seeded = True
+    
+    def stats(self) -> Dict:
+        """Engagement statistics in the get_session_engagement_stats shape"""
+        return {
+            'total_students': len(self.levels),
+            'active_students': self.counts[models.EngagementLevel.ACTIVE],
+            'moderate_students': self.counts[models.EngagementLevel.MODERATE],
+            'passive_students': self.counts[models.EngagementLevel.PASSIVE]
+        }
+
 
 class EngagementService:
     """Service for managing student engagement"""
     
     def __init__(self):
-        self.classifier = create_classifier(use_ml=False)
+        self.classifier = get_classifier()
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[int, int, models.EngagementLevel], None]] = []
+        # (session_id, student_id) -> latest log (None if the student has none)
+        self._latest_cache: TTLCache = TTLCache(maxsize=50_000, ttl=ENGAGEMENT_LATEST_TTL)
+        # session_id -> running level counts, maintained as logs are written
+        # and reseeded once the entry expires
+        self._session_counters: TTLCache = TTLCache(maxsize=1024, ttl=ENGAGEMENT_COUNTER_TTL)
+    
+    def add_listener(self, listener: Callable[[int, int, models.EngagementLevel], None]):
+        """
+        Register a callback invoked whenever a new engagement level is logged
+        
+        Args:
+            listener: Callable taking (session_id, student_id, engagement_level)
+        """
+        self._listeners.append(listener)
+    
+    def _notify_listeners(
+        self,
+        session_id: int,
+        student_id: int,
+        engagement_level: models.EngagementLevel
+    ):
+        """Push a freshly logged engagement level to all registered listeners"""
+        for listener in self._listeners:
+            try:
+                listener(session_id, student_id, engagement_level)
+            except Exception as e:
+                logger.error("Engagement listener failed: %s", e, exc_info=True)
+    
+    def _session_counter(self, session_id: int) -> SessionLevelCounter:
+        """Get or create the running level counter for a session"""
+        counter = self._session_counters.get(session_id)
+        if counter is None:
+            counter = self._session_counters[session_id] = SessionLevelCounter()
+        return counter
+    
+    def _apply_written(self, rows: List[Dict]):
+        """
+        Update in-process state for newly committed engagement logs
+        
+        Drops cached latest logs for the written students and moves session
+        counters to each student's new latest level, in commit order.
+        
+        Args:
+            rows: Written rows (student_id, session_id, engagement_level)
+        """
+        for row in rows:
+            self._latest_cache.pop((row["session_id"], row["student_id"]), None)
+            self._session_counter(row["session_id"]).record(
+                row["student_id"], row["engagement_level"]
+            )
     
     def classify_engagement(
         self,
@@ -34,9 +209,9 @@ class EngagementService:
         """
         return self.classifier.classify(response_time_ms, is_correct)
     
-    def log_engagement(
+    async def log_engagement(
         self,
-        db: Session,
+        db: AsyncSession,
         student_id: int,
         session_id: int,
         response_time_ms: int,
@@ -58,29 +233,181 @@ class EngagementService:
         # Classify engagement
         engagement_level = self.classify_engagement(response_time_ms, is_correct)
         
-        # Create engagement log
-        engagement_log = models.EngagementLog(
-            student_id=student_id,
-            session_id=session_id,
-            engagement_level=engagement_level,
-            timestamp=datetime.utcnow()
+        # Insert and read back the row in one round-trip (no flush + refresh)
+        engagement_log = await db.scalar(
+            insert(models.EngagementLog)
+            .values(
+                student_id=student_id,
+                session_id=session_id,
+                engagement_level=engagement_level,
+                timestamp=datetime.utcnow()
+            )
+            .returning(models.EngagementLog)
         )
+        await db.commit()
+        self._apply_written([{
+            "student_id": student_id,
+            "session_id": session_id,
+            "engagement_level": engagement_level
+        }])
+        self._notify_listeners(session_id, student_id, engagement_level)
         
-        db.add(engagement_log)
-        db.commit()
-        db.refresh(engagement_log)
-        
-        logger.info(f"Logged engagement: student={student_id}, level={engagement_level}")
+        logger.info("Logged engagement: student=%s, level=%s", student_id, engagement_level)
         return engagement_log
     
-    def get_current_engagement(
+    def start_writer(self):
+        """Start the background task that batches queued engagement logs"""
+        if self._writer_task is not None:
+            return
+        
+        self._queue = asyncio.Queue(maxsize=ENGAGEMENT_QUEUE_SIZE)
+        self._writer_task = asyncio.create_task(self._engagement_writer(self._queue))
+        logger.info("Engagement writer started")
+    
+    async def stop_writer(self):
+        """Stop the background writer, flushing any queued engagement logs"""
+        if self._writer_task is None:
+            return
+        
+        # Detach the queue first so logs arriving during shutdown are written
+        # directly, then let the writer drain everything ahead of the sentinel
+        queue, self._queue = self._queue, None
+        await queue.put(_STOP_WRITER)
+        await self._writer_task
+        
+        self._writer_task = None
+        logger.info("Engagement writer stopped")
+    
+    async def flush(self):
+        """
+        Wait until every engagement log queued before this call has been written
+        
+        Queues a marker future behind those logs and waits for the writer to
+        resolve it, so logs enqueued afterwards by other sessions don't delay
+        the caller.
+        """
+        if self._queue is None:
+            return
+        
+        marker = asyncio.get_running_loop().create_future()
+        await self._queue.put(marker)
+        await marker
+    
+    async def enqueue_engagement(
         self,
-        db: Session,
+        student_id: int,
+        session_id: int,
+        response_time_ms: int,
+        is_correct: bool
+    ) -> models.EngagementLevel:
+        """
+        Classify engagement and queue the log for a batched background write
+        
+        Falls back to an immediate write if the background writer is not running.
+        
+        Args:
+            student_id: Student ID
+            session_id: Session ID
+            response_time_ms: Response time
+            is_correct: Correctness
+        
+        Returns:
+            Classified EngagementLevel
+        """
+        engagement_level = self.classify_engagement(response_time_ms, is_correct)
+        row = {
+            "student_id": student_id,
+            "session_id": session_id,
+            "engagement_level": engagement_level,
+            "timestamp": datetime.utcnow()
+        }
+        
+        if self._queue is None:
+            await self._write_engagement_batch([row])
+        else:
+            await self._queue.put(row)
+        
+        self._notify_listeners(session_id, student_id, engagement_level)
+        return engagement_level
+    
+    async def _engagement_writer(self, queue: asyncio.Queue):
+        """
+        Drain the engagement queue in batches until the stop sentinel arrives
+        
+        Args:
+            queue: Queue of row dictionaries, flush markers and the sentinel
+        """
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + ENGAGEMENT_FLUSH_INTERVAL
+            
+            # A flush marker or the stop sentinel closes the batch early
+            while len(batch) < ENGAGEMENT_BATCH_SIZE and not _closes_batch(batch[-1]):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            stopping = batch[-1] is _STOP_WRITER
+            if stopping:
+                batch.pop()
+            
+            await self._write_queued(batch)
+            
+            if stopping:
+                return
+    
+    async def _write_queued(self, items: List):
+        """
+        Write queued engagement rows, then release flush markers queued among them
+        
+        Args:
+            items: Row dictionaries and flush marker futures, in queue order
+        """
+        rows = [item for item in items if not isinstance(item, asyncio.Future)]
+        if rows:
+            await self._write_engagement_batch(rows)
+        
+        for item in items:
+            if isinstance(item, asyncio.Future) and not item.done():
+                item.set_result(None)
+    
+    async def _write_engagement_batch(self, rows: List[Dict]):
+        """
+        Insert a batch of engagement logs in one statement
+        
+        Uses Core executemany so SQLAlchemy's insertmanyvalues batches the
+        rows into multi-row INSERTs with one cached statement, instead of
+        compiling a new VALUES clause for every batch size.
+        
+        Args:
+            rows: Engagement log column dictionaries
+        """
+        try:
+            async with SessionLocal() as db:
+                await db.execute(insert(models.EngagementLog), rows)
+                await db.commit()
+            self._apply_written(rows)
+            logger.debug("Wrote %s engagement logs", len(rows))
+        except Exception as e:
+            logger.error("Failed to write %s engagement logs: %s", len(rows), e, exc_info=True)
+    
+    async def get_latest_engagement_log(
+        self,
+        db: AsyncSession,
         student_id: int,
         session_id: int
-    ) -> Optional[models.EngagementLevel]:
+    ) -> Optional[schema.EngagementLogResponse]:
         """
-        Get current engagement level for a student
+        Get the most recent engagement log for a student
+        
+        Served from a short-lived cache that is invalidated whenever a new log
+        for the student is written.
         
         Args:
             db: Database session
@@ -88,21 +415,50 @@ class EngagementService:
             session_id: Session ID
         
         Returns:
-            Current engagement level or None
-        """
-        log = (
-            db.query(models.EngagementLog)
-            .filter(models.EngagementLog.student_id == student_id)
-            .filter(models.EngagementLog.session_id == session_id)
-            .order_by(models.EngagementLog.timestamp.desc())
-            .first()
+            Latest engagement log or None
+        """
+        key = (session_id, student_id)
+        if key in self._latest_cache:
+            return self._latest_cache[key]
+        
+        result = await db.execute(
+            _latest_engagement_stmt,
+            {"student_id": student_id, "session_id": session_id}
         )
+        log = result.scalars().first()
+        latest = schema.EngagementLogResponse.model_validate(log) if log else None
+        self._latest_cache[key] = latest
+        return latest
+    
+    async def get_current_engagement_bulk(
+        self,
+        db: AsyncSession,
+        session_id: int,
+        student_ids: Set[int]
+    ) -> Dict[int, models.EngagementLevel]:
+        """
+        Get current engagement levels for many students in one query
+        
+        Args:
+            db: Database session
+            session_id: Session ID
+            student_ids: Student IDs to look up
+        
+        Returns:
+            Dictionary of student_id -> EngagementLevel (students without logs are omitted)
+        """
+        if not student_ids:
+            return {}
         
-        return log.engagement_level if log else None
+        result = await db.execute(
+            _roster_latest_engagement_stmt,
+            {"session_id": session_id, "student_ids": list(student_ids)}
+        )
+        return {row.student_id: row.engagement_level for row in result}
     
-    def get_student_engagement_history(
+    async def get_student_engagement_history(
         self,
-        db: Session,
+        db: AsyncSession,
         student_id: int,
         session_id: int,
         limit: int = 10
@@ -119,20 +475,16 @@ class EngagementService:
         Returns:
             List of engagement logs
         """
-        logs = (
-            db.query(models.EngagementLog)
-            .filter(models.EngagementLog.student_id == student_id)
-            .filter(models.EngagementLog.session_id == session_id)
-            .order_by(models.EngagementLog.timestamp.desc())
-            .limit(limit)
-            .all()
+        result = await db.execute(
+            _engagement_history_stmt,
+            {"student_id": student_id, "session_id": session_id, "limit": limit}
         )
         
-        return logs
+        return result.scalars().all()
     
-    def get_session_engagement_stats(
+    async def get_session_engagement_stats(
         self,
-        db: Session,
+        db: AsyncSession,
         session_id: int
     ) -> Dict:
         """
@@ -145,36 +497,21 @@ class EngagementService:
         Returns:
             Dictionary with engagement statistics
         """
-        # Get all engagement logs for session
-        logs = (
-            db.query(models.EngagementLog)
-            .filter(models.EngagementLog.session_id == session_id)
-            .all()
-        )
+        counter = self._session_counter(session_id)
         
-        # Get unique students
-        student_ids = list(set(log.student_id for log in logs))
-        
-        # Get latest engagement for each student
-        student_engagement = {}
-        for student_id in student_ids:
-            latest_log = (
-                db.query(models.EngagementLog)
-                .filter(models.EngagementLog.student_id == student_id)
-                .filter(models.EngagementLog.session_id == session_id)
-                .order_by(models.EngagementLog.timestamp.desc())
-                .first()
-            )
-            if latest_log:
-                student_engagement[student_id] = latest_log.engagement_level
-        
-        # Calculate statistics
-        stats = {
-            'total_students': len(student_engagement),
-            'active_students': sum(1 for e in student_engagement.values() if e == models.EngagementLevel.ACTIVE),
-            'moderate_students': sum(1 for e in student_engagement.values() if e == models.EngagementLevel.MODERATE),
-            'passive_students': sum(1 for e in student_engagement.values() if e == models.EngagementLevel.PASSIVE)
-        }
+        # New or expired counter: load each student's latest level; until the
+        # entry expires the counts are kept current by the write path
+        if not counter.seeded:
+            result = await db.execute(latest_engagement_stmt(session_id))
+            counter.seed(result.all())
         
-        return stats
+        return counter.stats()
+
+
+# Global engagement service instance
+_engagement_service = EngagementService()
+
 
+def get_engagement_service() -> EngagementService:
+    """Get the global engagement service instance"""
+    return _engagement_service
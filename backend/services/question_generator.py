@@ -2,9 +2,37 @@
 Question generation module with mock ML function
 This module will be replaced with actual ML model in production
 """
-import random
 from typing import List, Dict
-from datetime import datetime
+
+
+# Mock templates, paired by index
+_QUESTION_TEMPLATES = (
+    "What is the main topic discussed in this lecture?",
+    "Which concept is most important in this section?",
+    "What is a key takeaway from this material?",
+    "Explain the primary concept discussed.",
+    "What would be the best application of this knowledge?",
+    "What problem does this solution address?",
+    "How does this concept relate to real-world scenarios?",
+    "What are the key components of this topic?",
+    "Why is this concept significant?",
+    "What are the implications of this discussion?"
+)
+
+_ANSWER_TEMPLATES = (
+    "The main topic is covered in the lecture material.",
+    "This is a key concept in the subject.",
+    "The primary takeaway is the understanding of fundamentals.",
+    "This concept is essential for advanced learning.",
+    "The best application is in practical scenarios.",
+    "This solution addresses common problems.",
+    "It relates directly to practical implementations.",
+    "The key components are comprehensively covered.",
+    "This concept is significant for understanding the topic.",
+    "The implications are far-reaching and important."
+)
+
+_NUM_TEMPLATES = len(_QUESTION_TEMPLATES)
 
 
 class Question:
@@ -37,48 +65,15 @@ def generate_questions_mock(text_chunks: List[str], num_questions: int = 5) -> L
     if not text_chunks:
         return []
     
-    questions = []
-    question_templates = [
-        "What is the main topic discussed in this lecture?",
-        "Which concept is most important in this section?",
-        "What is a key takeaway from this material?",
-        "Explain the primary concept discussed.",
-        "What would be the best application of this knowledge?",
-        "What problem does this solution address?",
-        "How does this concept relate to real-world scenarios?",
-        "What are the key components of this topic?",
-        "Why is this concept significant?",
-        "What are the implications of this discussion?"
-    ]
-    
-    answer_templates = [
-        "The main topic is covered in the lecture material.",
-        "This is a key concept in the subject.",
-        "The primary takeaway is the understanding of fundamentals.",
-        "This concept is essential for advanced learning.",
-        "The best application is in practical scenarios.",
-        "This solution addresses common problems.",
-        "It relates directly to practical implementations.",
-        "The key components are comprehensively covered.",
-        "This concept is significant for understanding the topic.",
-        "The implications are far-reaching and important."
+    # Generate one question per slide, up to num_questions
+    return [
+        {
+            'text': f"{_QUESTION_TEMPLATES[i % _NUM_TEMPLATES]} (Based on Slide {i + 1})",
+            'correct_answer': f"{_ANSWER_TEMPLATES[i % _NUM_TEMPLATES]} (Slide {i + 1})",
+            'source_slide': i
+        }
+        for i in range(min(num_questions, len(text_chunks)))
     ]
-    
-    # Generate questions based on number of text chunks
-    for i in range(min(num_questions, len(text_chunks))):
-        template_idx = i % len(question_templates)
-        slide_idx = i % len(text_chunks)
-        
-        question_text = f"{question_templates[template_idx]} (Based on Slide {slide_idx + 1})"
-        correct_answer = f"{answer_templates[template_idx]} (Slide {slide_idx + 1})"
-        
-        questions.append({
-            'text': question_text,
-            'correct_answer': correct_answer,
-            'source_slide': slide_idx
-        })
-    
-    return questions
 
 
 def prepare_text_for_model(text_chunks: List[str]) -> str:
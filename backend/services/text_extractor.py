@@ -3,68 +3,136 @@ Text extraction from PDF and PPTX files
 """
 import fitz  # PyMuPDF
 from pptx import Presentation
-from typing import List
+from cachetools import LRUCache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Union
+import asyncio
 import io
+import multiprocessing
+import os
+import re
+import logging
 
+logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(file_content: bytes) -> List[str]:
+# Process pool for CPU-bound extraction, managed by the application lifespan
+_extractor_pool: Optional[ProcessPoolExecutor] = None
+_extractor_workers = 1
+
+# Below this page count, splitting a PDF across workers costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 8
+
+# Extracted chunks of recent uploads, keyed by (content hash, file type)
+_extract_cache: LRUCache = LRUCache(maxsize=64)
+
+# Extractors accept raw bytes or a path to the file on disk
+Source = Union[bytes, str]
+
+# Plain-text extraction flags: keep whitespace and page clipping, but skip
+# ligature preservation and image/span bookkeeping
+_PDF_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+# A line break plus any surrounding whitespace (including blank lines)
+_LINE_BREAK_RE = re.compile(r'\s*\n\s*')
+
+
+def _open_pdf(source: Source) -> fitz.Document:
+    """Open a PDF from bytes or from a file path (memory-mapped by MuPDF)"""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def count_pdf_pages(source: Source) -> int:
+    """Page count of a PDF (runs in the extractor pool: opening may repair the file)"""
+    with _open_pdf(source) as doc:
+        return doc.page_count
+
+
+def extract_text_from_pdf(source: Source) -> List[str]:
     """
     Extract text from PDF file
     
     Args:
-        file_content: PDF file as bytes
+        source: PDF file as bytes or path on disk
     
     Returns:
         List of text chunks from each page
     """
     try:
-        doc = fitz.open(stream=io.BytesIO(file_content), filetype="pdf")
-        text_chunks = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            # Clean and chunk text
-            cleaned_text = clean_text(text)
-            if cleaned_text:
-                text_chunks.append(cleaned_text)
-        
-        doc.close()
-        return text_chunks
+        return extract_text_from_pdf_pages(source, 0, None)
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
 
 
-def extract_text_from_pptx(file_content: bytes) -> List[str]:
+def iter_text_from_pdf(source: Source, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """
+    Lazily yield cleaned text for each non-empty page in a range
+    
+    Only the current page's text is held in memory; the document is closed
+    once the iterator is exhausted or discarded.
+    
+    Args:
+        source: PDF file as bytes or path on disk
+        start: First page index (inclusive)
+        stop: Last page index (exclusive), or None for the end of the document
+    
+    Yields:
+        Cleaned text of each page
+    """
+    with _open_pdf(source) as doc:
+        for page in doc.pages(start, stop):
+            cleaned_text = clean_text(page.get_text("text", flags=_PDF_TEXT_FLAGS))
+            if cleaned_text:
+                yield cleaned_text
+
+
+def extract_text_from_pdf_pages(source: Source, start: int, stop: Optional[int]) -> List[str]:
+    """
+    Extract text from a contiguous range of PDF pages
+    
+    Materializes iter_text_from_pdf so the result can be returned from a
+    worker process.
+    
+    Args:
+        source: PDF file as bytes or path on disk
+        start: First page index (inclusive)
+        stop: Last page index (exclusive), or None for the end of the document
+    
+    Returns:
+        List of text chunks from each page in the range
+    """
+    return list(iter_text_from_pdf(source, start, stop))
+
+
+def _extract_slide(slide) -> str:
+    """Combine and clean the text of every shape on a slide"""
+    slide_text = [shape.text for shape in slide.shapes if hasattr(shape, "text") and shape.text]
+    return clean_text("\n".join(slide_text))
+
+
+def extract_text_from_pptx(source: Source) -> List[str]:
     """
     Extract text from PPTX file
     
+    Slides are processed on a thread pool; ex.map keeps slide order.
+    
     Args:
-        file_content: PPTX file as bytes
+        source: PPTX file as bytes or path on disk
     
     Returns:
         List of text chunks from each slide
     """
     try:
-        prs = Presentation(io.BytesIO(file_content))
-        text_chunks = []
+        prs = Presentation(source if isinstance(source, str) else io.BytesIO(source))
+        slides = list(prs.slides)
+        if not slides:
+            return []
         
-        for slide_num, slide in enumerate(prs.slides):
-            slide_text = []
-            
-            # Extract text from all shapes in slide
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text:
-                    slide_text.append(shape.text)
-            
-            # Clean and combine text
-            combined_text = "\n".join(slide_text)
-            cleaned_text = clean_text(combined_text)
-            
-            if cleaned_text:
-                text_chunks.append(cleaned_text)
+        with ThreadPoolExecutor(max_workers=min(len(slides), os.cpu_count() or 1)) as ex:
+            chunks = list(ex.map(_extract_slide, slides))
         
-        return text_chunks
+        return [chunk for chunk in chunks if chunk]
     except Exception as e:
         raise Exception(f"Error extracting text from PPTX: {str(e)}")
 
@@ -82,33 +150,118 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove excessive whitespace
-    lines = text.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        line = line.strip()
-        if line:
-            cleaned_lines.append(line)
-    
-    return "\n".join(cleaned_lines)
+    # Strip every line and drop blank ones in a single regex pass
+    return _LINE_BREAK_RE.sub("\n", text).strip()
 
 
-def extract_text_by_type(file_content: bytes, file_type: str) -> List[str]:
+def extract_text_by_type(source: Source, file_type: str) -> List[str]:
     """
     Extract text based on file type
     
     Args:
-        file_content: File content as bytes
+        source: File content as bytes or path on disk
         file_type: File MIME type (e.g., 'application/pdf', 'application/vnd.openxmlformats-officedocument.presentationml.presentation')
     
     Returns:
         List of text chunks
     """
     if file_type == 'application/pdf':
-        return extract_text_from_pdf(file_content)
+        return extract_text_from_pdf(source)
     elif file_type == 'application/vnd.openxmlformats-officedocument.presentationml.presentation':
-        return extract_text_from_pptx(file_content)
+        return extract_text_from_pptx(source)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
+
+
+def start_extractor_pool(max_workers: Optional[int] = None):
+    """
+    Start the process pool used for text extraction
+    
+    Args:
+        max_workers: Number of worker processes (defaults to CPU count)
+    """
+    global _extractor_pool, _extractor_workers
+    
+    if _extractor_pool is None:
+        _extractor_workers = max_workers or os.cpu_count() or 1
+        # Spawn rather than fork: the pool starts after the event loop, executor
+        # threads and DB connections exist, none of which survive a fork safely
+        _extractor_pool = ProcessPoolExecutor(
+            max_workers=_extractor_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Started text extractor pool with {_extractor_workers} workers")
+
+
+def shutdown_extractor_pool():
+    """Shut down the text extraction process pool"""
+    global _extractor_pool
+    
+    if _extractor_pool is not None:
+        _extractor_pool.shutdown(wait=True)
+        _extractor_pool = None
+        logger.info("Text extractor pool shut down")
+
+
+def get_extractor_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the text extraction process pool (None if not started)"""
+    return _extractor_pool
+
+
+async def extract_text_async(
+    source: Source,
+    file_type: str,
+    content_hash: Optional[str] = None
+) -> List[str]:
+    """
+    Extract text off the event loop using the extractor process pool
+    
+    Larger PDFs are split into one contiguous page range per worker so
+    pages are extracted in parallel; everything else runs as a single job.
+    Pass a file path rather than bytes to avoid copying the content to
+    every worker. When content_hash is given, repeat uploads of the same
+    file are served from an in-process LRU cache.
+    
+    Args:
+        source: File content as bytes or path on disk
+        file_type: File MIME type
+        content_hash: Optional digest of the file content
+    
+    Returns:
+        List of text chunks
+    """
+    key = (content_hash, file_type)
+    if content_hash is not None and key in _extract_cache:
+        logger.info(f"Extraction cache hit for {content_hash}")
+        return list(_extract_cache[key])
+    
+    chunks = await _extract_text_in_pool(source, file_type)
+    
+    if content_hash is not None:
+        _extract_cache[key] = tuple(chunks)
+    return chunks
+
+
+async def _extract_text_in_pool(source: Source, file_type: str) -> List[str]:
+    """Run extraction on the process pool, fanning large PDFs out by page range"""
+    loop = asyncio.get_running_loop()
+    
+    if file_type == 'application/pdf' and _extractor_pool is not None and _extractor_workers > 1:
+        page_count = await loop.run_in_executor(_extractor_pool, count_pdf_pages, source)
+        
+        if page_count >= PARALLEL_PAGE_THRESHOLD:
+            step = -(-page_count // _extractor_workers)
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(
+                    _extractor_pool,
+                    extract_text_from_pdf_pages,
+                    source,
+                    start,
+                    min(start + step, page_count)
+                )
+                for start in range(0, page_count, step)
+            ))
+            return [chunk for part in parts for chunk in part]
+    
+    return await loop.run_in_executor(_extractor_pool, extract_text_by_type, source, file_type)
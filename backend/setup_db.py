@@ -4,6 +4,7 @@ Run this to initialize the database
 """
 import sys
 import os
+import asyncio
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -19,7 +20,7 @@ def main():
     """Initialize database"""
     logger.info("Initializing database...")
     try:
-        init_db()
+        asyncio.run(init_db())
         logger.info("Database initialized successfully!")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
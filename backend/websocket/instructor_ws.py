@@ -5,7 +5,8 @@ Sends real-time engagement updates
 from fastapi import WebSocket, WebSocketDisconnect
 from typing import Dict, Set
 from database.schema import DashboardUpdate, EngagementMessage
-import json
+import asyncio
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,7 +35,7 @@ class InstructorWebSocketManager:
         self.active_connections[instructor_id].add(websocket)
         self.instructor_sessions[websocket] = instructor_id
         
-        logger.info(f"Instructor {instructor_id} connected")
+        logger.info("Instructor %s connected", instructor_id)
     
     def disconnect(self, websocket: WebSocket):
         """
@@ -43,14 +44,14 @@ class InstructorWebSocketManager:
         Args:
             websocket: WebSocket connection
         """
-        instructor_id = self.instructor_sessions.get(websocket)
+        instructor_id = self.instructor_sessions.pop(websocket, None)
         
-        if instructor_id and instructor_id in self.active_connections:
-            self.active_connections[instructor_id].remove(websocket)
-            logger.info(f"Instructor {instructor_id} disconnected")
-        
-        if websocket in self.instructor_sessions:
-            del self.instructor_sessions[websocket]
+        connections = self.active_connections.get(instructor_id)
+        if connections:
+            connections.discard(websocket)
+            if not connections:
+                self.active_connections.pop(instructor_id, None)
+            logger.info("Instructor %s disconnected", instructor_id)
     
     async def send_dashboard_update(self, instructor_id: int, update: DashboardUpdate):
         """
@@ -63,13 +64,8 @@ class InstructorWebSocketManager:
         if instructor_id not in self.active_connections:
             return
         
-        message = update.dict()
-        
-        for websocket in list(self.active_connections[instructor_id]):
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending dashboard update to instructor {instructor_id}: {e}")
+        message = orjson.dumps(update.model_dump(mode="json")).decode()
+        await self._broadcast(instructor_id, message, "dashboard")
     
     async def send_engagement_update(self, instructor_id: int, update: EngagementMessage):
         """
@@ -82,13 +78,30 @@ class InstructorWebSocketManager:
         if instructor_id not in self.active_connections:
             return
         
-        message = update.dict()
+        message = orjson.dumps(update.model_dump(mode="json")).decode()
+        await self._broadcast(instructor_id, message, "engagement")
+    
+    async def _broadcast(self, instructor_id: int, message: str, kind: str):
+        """
+        Send one serialized payload to all of an instructor's WebSockets concurrently
+        
+        Sockets whose send fails are disconnected.
+        
+        Args:
+            instructor_id: Instructor ID
+            message: JSON payload
+            kind: Update kind, used for logging
+        """
+        websockets = list(self.active_connections[instructor_id])
+        results = await asyncio.gather(
+            *(websocket.send_text(message) for websocket in websockets),
+            return_exceptions=True
+        )
         
-        for websocket in list(self.active_connections[instructor_id]):
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending engagement update to instructor {instructor_id}: {e}")
+        for websocket, result in zip(websockets, results):
+            if isinstance(result, Exception):
+                logger.error("Error sending %s update to instructor %s: %s", kind, instructor_id, result)
+                self.disconnect(websocket)
 
 
 # Global WebSocket manager
@@ -3,9 +3,10 @@ WebSocket endpoint for student interface
 Handles incoming questions and outgoing responses
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Set
+from typing import Dict, Set, Tuple
 from database.schema import QuestionMessage, ResponseMessage
-import json
+import asyncio
+import orjson
 import logging
 from datetime import datetime
 
@@ -17,7 +18,8 @@ class StudentWebSocketManager:
     
     def __init__(self):
         self.active_connections: Dict[int, Set[WebSocket]] = {}  # session_id -> set of websockets
-        self.student_sessions: Dict[WebSocket, int] = {}  # websocket -> student_id
+        self.student_sessions: Dict[WebSocket, Tuple[int, int]] = {}  # websocket -> (session_id, student_id)
+        self._by_session_student: Dict[Tuple[int, int], WebSocket] = {}  # (session_id, student_id) -> websocket
     
     async def connect(self, websocket: WebSocket, session_id: int, student_id: int):
         """
@@ -35,9 +37,10 @@ class StudentWebSocketManager:
             self.active_connections[session_id] = set()
         
         self.active_connections[session_id].add(websocket)
-        self.student_sessions[websocket] = student_id
+        self.student_sessions[websocket] = (session_id, student_id)
+        self._by_session_student[(session_id, student_id)] = websocket
         
-        logger.info(f"Student {student_id} connected to session {session_id}")
+        logger.info("Student %s connected to session %s", student_id, session_id)
     
     def disconnect(self, websocket: WebSocket):
         """
@@ -46,18 +49,22 @@ class StudentWebSocketManager:
         Args:
             websocket: WebSocket connection
         """
-        student_id = self.student_sessions.get(websocket)
-        
-        # Find and remove from active connections
-        for session_id, connections in list(self.active_connections.items()):
-            if websocket in connections:
-                connections.remove(websocket)
-                logger.info(f"Student {student_id} disconnected from session {session_id}")
-                break
-        
-        # Remove from student sessions
-        if websocket in self.student_sessions:
-            del self.student_sessions[websocket]
+        key = self.student_sessions.pop(websocket, None)
+        if key is None:
+            return
+        
+        session_id, student_id = key
+        connections = self.active_connections.get(session_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[session_id]
+        
+        # A reconnect may already have replaced this socket in the reverse index
+        if self._by_session_student.get(key) is websocket:
+            del self._by_session_student[key]
+        
+        logger.info("Student %s disconnected from session %s", student_id, session_id)
     
     async def send_question_to_student(self, session_id: int, student_id: int, question: QuestionMessage):
         """
@@ -68,26 +75,8 @@ class StudentWebSocketManager:
             student_id: Student ID
             question: Question message
         """
-        if session_id not in self.active_connections:
-            logger.warning(f"No active connections for session {session_id}")
-            return
-        
-        # Find WebSocket for this student
-        target_websocket = None
-        for ws, sid in self.student_sessions.items():
-            if sid == student_id and ws in self.active_connections[session_id]:
-                target_websocket = ws
-                break
-        
-        if target_websocket:
-            try:
-                message = question.dict()
-                await target_websocket.send_json(message)
-                logger.info(f"Sent question to student {student_id}")
-            except Exception as e:
-                logger.error(f"Error sending question to student {student_id}: {e}")
-        else:
-            logger.warning(f"Student {student_id} not connected in session {session_id}")
+        message = orjson.dumps(question.model_dump(mode="json")).decode()
+        await self._send_to_students(session_id, {student_id}, message)
     
     async def send_question_to_multiple_students(
         self,
@@ -98,13 +87,46 @@ class StudentWebSocketManager:
         """
         Send question to multiple students
         
+        The question is serialized once and the same payload is sent to every socket.
+        
         Args:
             session_id: Session ID
             student_ids: Set of student IDs
             question: Question message
         """
+        message = orjson.dumps(question.model_dump(mode="json")).decode()
+        await self._send_to_students(session_id, student_ids, message)
+    
+    async def _send_to_students(self, session_id: int, student_ids: Set[int], message: str):
+        """
+        Send an already serialized message to students' WebSockets concurrently
+        
+        Sockets whose send fails are disconnected.
+        
+        Args:
+            session_id: Session ID
+            student_ids: Set of student IDs
+            message: JSON payload
+        """
+        targets = []
         for student_id in student_ids:
-            await self.send_question_to_student(session_id, student_id, question)
+            websocket = self._by_session_student.get((session_id, student_id))
+            if websocket is None:
+                logger.warning("Student %s not connected in session %s", student_id, session_id)
+            else:
+                targets.append((student_id, websocket))
+        
+        results = await asyncio.gather(
+            *(websocket.send_text(message) for _, websocket in targets),
+            return_exceptions=True
+        )
+        
+        for (student_id, websocket), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error("Error sending question to student %s: %s", student_id, result)
+                self.disconnect(websocket)
+            else:
+                logger.info("Sent question to student %s", student_id)
     
     async def receive_response(self, websocket: WebSocket) -> ResponseMessage:
         """
@@ -117,11 +139,9 @@ class StudentWebSocketManager:
             ResponseMessage
         """
         try:
-            data = await websocket.receive_json()
-            response = ResponseMessage(**data)
-            return response
+            return ResponseMessage.model_validate_json(await websocket.receive_text())
         except Exception as e:
-            logger.error(f"Error receiving response: {e}")
+            logger.error("Error receiving response: %s", e)
             raise
     
     def get_connected_students(self, session_id: int) -> Set[int]:
@@ -134,15 +154,11 @@ class StudentWebSocketManager:
         Returns:
             Set of student IDs
         """
-        if session_id not in self.active_connections:
-            return set()
-        
-        connected_students = set()
-        for ws in self.active_connections[session_id]:
-            if ws in self.student_sessions:
-                connected_students.add(self.student_sessions[ws])
-        
-        return connected_students
+        return {
+            self.student_sessions[ws][1]
+            for ws in self.active_connections.get(session_id, ())
+            if ws in self.student_sessions
+        }
 
 
 # Global WebSocket manager
@@ -2,12 +2,14 @@
 Session management for Zoom-integrated sessions
 Manages the lifecycle of learning sessions
 """
-from sqlalchemy.orm import Session
-from typing import Dict, Set, Optional
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Set, Optional
 from database import models
 from datetime import datetime
 from .zoom_events import get_zoom_event_handler
-from ..services.adaptive_engine import get_adaptive_engine
+from services.adaptive_engine import get_adaptive_engine
+from services.engagement_service import get_engagement_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,10 +21,13 @@ class SessionManager:
     def __init__(self):
         self.zoom_handler = get_zoom_event_handler()
         self.adaptive_engine = get_adaptive_engine()
+        self.engagement_service = get_engagement_service()
+        self._state_cache: Dict[int, Dict] = {}  # session_id -> session state
+        self._meeting_sessions: Dict[str, int] = {}  # zoom_meeting_id -> session_id
     
-    def create_session(
+    async def create_session(
         self,
-        db: Session,
+        db: AsyncSession,
         instructor_id: int,
         zoom_meeting_id: Optional[str] = None
     ) -> models.Session:
@@ -45,15 +50,15 @@ class SessionManager:
         )
         
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
         
-        logger.info(f"Created session {session.id} for instructor {instructor_id}")
+        logger.info("Created session %s for instructor %s", session.id, instructor_id)
         return session
     
-    def start_session(
+    async def start_session(
         self,
-        db: Session,
+        db: AsyncSession,
         session_id: int,
         student_ids: Set[int]
     ):
@@ -65,24 +70,20 @@ class SessionManager:
             session_id: Session ID
             student_ids: Set of student IDs
         """
-        session = db.query(models.Session).filter(models.Session.id == session_id).first()
-        
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-        
-        session.status = models.SessionStatus.ACTIVE
-        db.commit()
+        session = await self._transition(db, session_id, status=models.SessionStatus.ACTIVE)
         
         # Add session to adaptive engine
         self.adaptive_engine.add_session(session_id, student_ids)
+        self._state_cache[session_id] = self._build_state(session, student_ids)
         
         # Start Zoom monitoring if meeting ID exists
         if session.zoom_meeting_id:
+            self._meeting_sessions[session.zoom_meeting_id] = session_id
             self.zoom_handler.start_monitoring(session.zoom_meeting_id)
         
-        logger.info(f"Started session {session_id} with {len(student_ids)} students")
+        logger.info("Started session %s with %s students", session_id, len(student_ids))
     
-    def stop_session(self, db: Session, session_id: int):
+    async def stop_session(self, db: AsyncSession, session_id: int):
         """
         Stop a session
         
@@ -90,25 +91,53 @@ class SessionManager:
             db: Database session
             session_id: Session ID
         """
-        session = db.query(models.Session).filter(models.Session.id == session_id).first()
-        
-        if not session:
-            raise ValueError(f"Session {session_id} not found")
-        
-        session.status = models.SessionStatus.ENDED
-        session.end_time = datetime.utcnow()
-        db.commit()
+        session = await self._transition(
+            db, session_id, status=models.SessionStatus.ENDED, end_time=datetime.utcnow()
+        )
         
         # Remove session from adaptive engine
         self.adaptive_engine.remove_session(session_id)
+        self._state_cache.pop(session_id, None)
+        
+        # Make sure the session's queued engagement logs reach the database
+        await self.engagement_service.flush()
         
         # Stop Zoom monitoring
         if session.zoom_meeting_id:
+            self._meeting_sessions.pop(session.zoom_meeting_id, None)
             self.zoom_handler.stop_monitoring(session.zoom_meeting_id)
         
-        logger.info(f"Stopped session {session_id}")
+        logger.info("Stopped session %s", session_id)
     
-    def update_session_students(self, db: Session, session_id: int):
+    async def _transition(self, db: AsyncSession, session_id: int, **values) -> models.Session:
+        """
+        Apply a lifecycle change with a single UPDATE ... RETURNING and commit
+        
+        Args:
+            db: Database session
+            session_id: Session ID
+            **values: Session columns to set
+        
+        Returns:
+            Updated Session model
+        
+        Raises:
+            ValueError: If the session does not exist
+        """
+        session = await db.scalar(
+            update(models.Session)
+            .where(models.Session.id == session_id)
+            .values(**values)
+            .returning(models.Session)
+        )
+        
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        await db.commit()
+        return session
+    
+    async def update_session_students(self, db: AsyncSession, session_id: int):
         """
         Update student list for active session based on Zoom participants
         
@@ -116,25 +145,68 @@ class SessionManager:
             db: Database session
             session_id: Session ID
         """
-        session = db.query(models.Session).filter(models.Session.id == session_id).first()
+        session = await db.get(models.Session, session_id)
         
         if not session or not session.zoom_meeting_id:
             return
         
         # Get current participants from Zoom
-        student_ids = self.zoom_handler.get_student_ids_from_participants(
+        student_ids = await self.zoom_handler.get_student_ids_from_participants(
             session.zoom_meeting_id
         )
         
+        self._set_session_students(session_id, student_ids)
+    
+    async def on_zoom_participants(self, meeting_id: str, participants: List[Dict]):
+        """
+        Zoom monitor callback: sync a session's students with its meeting
+        
+        Only called with successfully fetched participant lists.
+        
+        Args:
+            meeting_id: Zoom meeting ID
+            participants: Participant dictionaries from ZoomEventHandler.get_participants
+        """
+        session_id = self._meeting_sessions.get(meeting_id)
+        if session_id is None:
+            return
+        
+        # Without a username mapping no participant resolves to a student, and
+        # applying that empty set would wipe the roster given to start_session
+        if not self.zoom_handler.student_mapping:
+            return
+        
+        student_ids = {
+            participant["student_id"] for participant in participants
+            if "student_id" in participant
+        }
+        self._set_session_students(session_id, student_ids)
+    
+    def _set_session_students(self, session_id: int, student_ids: Set[int]):
+        """
+        Apply a new student set to the adaptive engine and the state cache
+        
+        Args:
+            session_id: Session ID
+            student_ids: Set of student IDs
+        """
         # Update adaptive engine
         self.adaptive_engine.update_session_students(session_id, student_ids)
         
-        logger.info(f"Updated session {session_id} with {len(student_ids)} students")
+        state = self._state_cache.get(session_id)
+        if state is not None:
+            state["num_students"] = len(student_ids)
+            state["student_ids"] = list(student_ids)
+        
+        logger.info("Updated session %s with %s students", session_id, len(student_ids))
     
-    def get_session_state(self, db: Session, session_id: int) -> Dict:
+    async def get_session_state(self, db: AsyncSession, session_id: int) -> Dict:
         """
         Get current session state
         
+        Served from the in-process state cache; the database is only hit on a
+        cold miss (e.g. after a restart or for sessions never started here).
+        
         Args:
             db: Database session
             session_id: Session ID
@@ -142,14 +214,33 @@ class SessionManager:
         Returns:
             Session state dictionary
         """
-        session = db.query(models.Session).filter(models.Session.id == session_id).first()
+        state = self._state_cache.get(session_id)
         
-        if not session:
-            return {}
+        if state is None:
+            session = await db.get(models.Session, session_id)
+            
+            if not session:
+                return {}
+            
+            # Get student IDs from adaptive engine
+            student_ids = self.adaptive_engine.active_sessions.get(session_id, set())
+            state = self._build_state(session, student_ids)
+            self._state_cache[session_id] = state
         
-        # Get student IDs from adaptive engine
-        student_ids = self.adaptive_engine.active_sessions.get(session_id, set())
+        return {**state, "student_ids": list(state["student_ids"])}
+    
+    @staticmethod
+    def _build_state(session: models.Session, student_ids: Set[int]) -> Dict:
+        """
+        Build the session state dictionary
+        
+        Args:
+            session: Session model
+            student_ids: Set of student IDs in session
         
+        Returns:
+            Session state dictionary
+        """
         return {
             "session_id": session.id,
             "status": session.status.value,
@@ -1,16 +1,50 @@
 """
 Zoom API integration for fetching live participants
 """
-import requests
-from typing import List, Dict, Optional
+import httpx
+import orjson
+from cachetools import LRUCache
+from typing import List, Dict, Optional, Tuple
 import os
 from dotenv import load_dotenv
+import asyncio
+import base64
 import logging
+import time
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Refresh the OAuth token this many seconds before Zoom expires it
+TOKEN_EXPIRY_SKEW = 60
+
+# Seconds a fetched participant list is served without asking Zoom again;
+# after that it is revalidated with If-None-Match
+PARTICIPANTS_CACHE_TTL = 15
+
+# Largest page the participants endpoint accepts; fewer pages per poll
+PARTICIPANTS_PAGE_SIZE = 300
+
+# Wait used when a 429 carries no usable Retry-After header
+RATE_LIMIT_DEFAULT_WAIT = 60.0
+
+
+class ZoomRateLimitError(Exception):
+    """Zoom answered 429; retry_after is the advised wait in seconds"""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"Zoom rate limit hit, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    """Read a delta-seconds Retry-After header, falling back to a default"""
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return RATE_LIMIT_DEFAULT_WAIT
+
 
 class ZoomAPI:
     """Zoom API client for fetching meeting participants"""
@@ -21,21 +55,77 @@ class ZoomAPI:
         self.account_id = os.getenv("ZOOM_ACCOUNT_ID")
         self.base_url = "https://api.zoom.us/v2"
         self.access_token: Optional[str] = None
+        
+        # Checked once here so token requests fail fast instead of sending
+        # malformed credentials to Zoom on every retry
+        self._missing_credentials = [
+            name for name, value in (
+                ("ZOOM_API_KEY", self.api_key),
+                ("ZOOM_API_SECRET", self.api_secret),
+                ("ZOOM_ACCOUNT_ID", self.account_id)
+            ) if not value
+        ]
+        if self._missing_credentials:
+            logger.warning(f"Zoom credentials not configured, missing: {', '.join(self._missing_credentials)}")
+        
+        # Credentials are static, so the Basic auth value is encoded once
+        self._basic_auth = base64.b64encode(f"{self.api_key}:{self.api_secret}".encode()).decode()
+        self._token_expires_at = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+        # meeting_id -> (etag, fresh_until, participants)
+        self._participants_cache: LRUCache = LRUCache(maxsize=256)
+        
+        # Shared connection pool; HTTP/2 multiplexes concurrent calls per host
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    
+    @property
+    def is_configured(self) -> bool:
+        """Whether all Zoom credentials are set"""
+        return not self._missing_credentials
     
-    def get_access_token(self) -> str:
+    def _token_valid(self) -> bool:
+        """Whether the cached access token is still inside its lifetime"""
+        return self.access_token is not None and time.monotonic() < self._token_expires_at
+    
+    async def get_access_token(self, force_refresh: bool = False) -> str:
         """
         Get OAuth access token for Zoom API
         
+        The token is cached until shortly before it expires; concurrent
+        callers share a single refresh.
+        
+        Args:
+            force_refresh: Discard the cached token (e.g. after a 401)
+        
         Returns:
             Access token string
         """
-        if self.access_token:
+        if not force_refresh and self._token_valid():
             return self.access_token
         
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        
+        stale_token = self.access_token
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited
+            if self._token_valid() and (not force_refresh or self.access_token != stale_token):
+                return self.access_token
+            return await self._request_access_token()
+    
+    async def _request_access_token(self) -> str:
+        """Fetch a new OAuth access token from Zoom"""
+        if self._missing_credentials:
+            raise ValueError(f"Zoom credentials not configured: {', '.join(self._missing_credentials)}")
+        
         url = f"https://zoom.us/oauth/token"
         
         headers = {
-            "Authorization": f"Basic {self._get_basic_auth()}"
+            "Authorization": f"Basic {self._basic_auth}"
         }
         
         params = {
@@ -44,50 +134,79 @@ class ZoomAPI:
         }
         
         try:
-            response = requests.post(url, headers=headers, params=params)
+            response = await self._client.post(url, headers=headers, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             self.access_token = data["access_token"]
+            self._token_expires_at = (
+                time.monotonic() + int(data.get("expires_in", 3600)) - TOKEN_EXPIRY_SKEW
+            )
             logger.info("Successfully obtained Zoom access token")
             return self.access_token
         except Exception as e:
             logger.error(f"Failed to get Zoom access token: {e}")
             raise
     
-    def _get_basic_auth(self) -> str:
-        """Get basic auth string for Zoom OAuth"""
-        import base64
-        credentials = f"{self.api_key}:{self.api_secret}"
-        encoded = base64.b64encode(credentials.encode()).decode()
-        return encoded
-    
-    def get_meeting_participants(self, meeting_id: str) -> List[Dict]:
+    async def _authorized_get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        extra_headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
         """
-        Get list of participants in a live meeting
+        GET a Zoom API URL with the bearer token, refreshing it once on 401
         
         Args:
-            meeting_id: Zoom meeting ID
+            url: Full API URL
+            params: Query parameters
+            extra_headers: Additional request headers
         
         Returns:
-            List of participant dictionaries
+            Response (status not checked)
         """
-        token = self.get_access_token()
+        token = await self.get_access_token()
+        response = await self._client.get(
+            url, params=params, headers=self._bearer_headers(token, extra_headers)
+        )
         
-        url = f"{self.base_url}/meetings/{meeting_id}/participants"
+        if response.status_code == 401:
+            logger.info("Zoom access token rejected, refreshing")
+            token = await self.get_access_token(force_refresh=True)
+            response = await self._client.get(
+                url, params=params, headers=self._bearer_headers(token, extra_headers)
+            )
         
+        return response
+    
+    @staticmethod
+    def _bearer_headers(token: str, extra_headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Request headers for an authorized Zoom API call"""
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
+        if extra_headers:
+            headers.update(extra_headers)
+        return headers
+    
+    async def get_meeting_participants(self, meeting_id: str) -> List[Dict]:
+        """
+        Get list of participants in a live meeting, or [] if Zoom can't be reached
         
+        Args:
+            meeting_id: Zoom meeting ID
+        
+        Returns:
+            List of participant dictionaries
+        
+        Raises:
+            ZoomRateLimitError: Zoom rate-limited the request
+        """
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            participants = data.get("participants", [])
-            logger.info(f"Retrieved {len(participants)} participants from meeting {meeting_id}")
-            return participants
-        except requests.exceptions.HTTPError as e:
+            return await self.fetch_meeting_participants(meeting_id)
+        except ZoomRateLimitError:
+            raise
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 logger.warning(f"Meeting {meeting_id} not found")
             else:
@@ -97,7 +216,98 @@ class ZoomAPI:
             logger.error(f"Error fetching meeting participants: {e}")
             return []
     
-    def get_meeting_info(self, meeting_id: str) -> Optional[Dict]:
+    async def fetch_meeting_participants(self, meeting_id: str) -> List[Dict]:
+        """
+        Fetch the participants of a live meeting, raising on any failure
+        
+        Results are served from a short-lived cache; stale entries are
+        revalidated with the ETag so an unchanged list costs a 304.
+        
+        Args:
+            meeting_id: Zoom meeting ID
+        
+        Returns:
+            List of participant dictionaries
+        
+        Raises:
+            ZoomRateLimitError: Zoom rate-limited the request
+            httpx.HTTPError: Request failed or Zoom returned an error status
+            ValueError: Zoom credentials are not configured
+        """
+        cached: Optional[Tuple[Optional[str], float, List[Dict]]] = (
+            self._participants_cache.get(meeting_id)
+        )
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[2]
+        
+        url = f"{self.base_url}/meetings/{meeting_id}/participants"
+        extra_headers = {"If-None-Match": cached[0]} if cached and cached[0] else None
+        
+        response = await self._get_participants_page(url, extra_headers=extra_headers)
+        
+        if response.status_code == 304 and cached is not None:
+            participants = cached[2]
+            etag = response.headers.get("ETag") or cached[0]
+        else:
+            if response.status_code == 404:
+                self._participants_cache.pop(meeting_id, None)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            participants = data.get("participants", [])
+            next_page_token = data.get("next_page_token")
+            
+            # The ETag only covers the first page, so multi-page lists are
+            # not revalidated and get refetched in full
+            etag = None if next_page_token else response.headers.get("ETag")
+            
+            # Each page's token comes from the previous response, so pages
+            # are necessarily fetched in sequence
+            while next_page_token:
+                response = await self._get_participants_page(url, page_token=next_page_token)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                participants.extend(data.get("participants", []))
+                next_page_token = data.get("next_page_token")
+            
+            logger.info(f"Retrieved {len(participants)} participants from meeting {meeting_id}")
+        
+        self._participants_cache[meeting_id] = (
+            etag,
+            time.monotonic() + PARTICIPANTS_CACHE_TTL,
+            participants
+        )
+        return participants
+    
+    async def _get_participants_page(
+        self,
+        url: str,
+        page_token: Optional[str] = None,
+        extra_headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Request one page of meeting participants
+        
+        Args:
+            url: Participants endpoint URL
+            page_token: next_page_token from the previous page
+            extra_headers: Additional request headers
+        
+        Returns:
+            Response (status not checked beyond rate limiting)
+        
+        Raises:
+            ZoomRateLimitError: Zoom rate-limited the request
+        """
+        params = {"page_size": PARTICIPANTS_PAGE_SIZE}
+        if page_token:
+            params["next_page_token"] = page_token
+        
+        response = await self._authorized_get(url, params, extra_headers)
+        if response.status_code == 429:
+            raise ZoomRateLimitError(_retry_after_seconds(response))
+        return response
+    
+    async def get_meeting_info(self, meeting_id: str) -> Optional[Dict]:
         """
         Get meeting information
         
@@ -107,21 +317,26 @@ class ZoomAPI:
         Returns:
             Meeting information dictionary
         """
-        token = self.get_access_token()
-        
         url = f"{self.base_url}/meetings/{meeting_id}"
         
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.get(url, headers=headers)
+            response = await self._authorized_get(url)
             response.raise_for_status()
-            meeting_info = response.json()
+            meeting_info = orjson.loads(response.content)
             return meeting_info
         except Exception as e:
             logger.error(f"Failed to get meeting info: {e}")
             return None
+    
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self._client.aclose()
+
+
+# Global Zoom API client
+_zoom_api = ZoomAPI()
+
 
+def get_zoom_api() -> ZoomAPI:
+    """Get the global Zoom API client"""
+    return _zoom_api
@@ -1,19 +1,23 @@
 """
 Zoom event handling and participant management
 """
-from typing import Dict, List, Set, Optional
-from .zoom_api import ZoomAPI
+from typing import Dict, List, Set, Optional, Tuple
+from .zoom_api import get_zoom_api, ZoomRateLimitError
 import logging
 import asyncio
+import random
 
 logger = logging.getLogger(__name__)
 
+# Upper bound (seconds) for the polling delay after repeated failures
+MONITOR_BACKOFF_MAX = 300
+
 
 class ZoomEventHandler:
     """Handle Zoom meeting events and maintain participant state"""
     
     def __init__(self):
-        self.zoom_api = ZoomAPI()
+        self.zoom_api = get_zoom_api()
         self.active_participants: Dict[str, Set[str]] = {}  # meeting_id -> set of user_names
         self.student_mapping: Dict[str, int] = {}  # zoom_username -> student_id
         self._running = False
@@ -49,7 +53,7 @@ class ZoomEventHandler:
             del self.active_participants[meeting_id]
         logger.info(f"Stopped monitoring meeting {meeting_id}")
     
-    def get_participants(self, meeting_id: str) -> List[Dict]:
+    async def get_participants(self, meeting_id: str) -> List[Dict]:
         """
         Get current participants in a meeting
         
@@ -59,15 +63,16 @@ class ZoomEventHandler:
         Returns:
             List of participant dictionaries with zoom username
         """
-        participants = self.zoom_api.get_meeting_participants(meeting_id)
+        participants, current_usernames = await self._fetch_and_parse(meeting_id)
         
-        # Extract usernames
-        participant_list = []
-        current_usernames = set()
+        # Resolve roster matches once as a set intersection rather than probing
+        # the full mapping per participant
+        mapping = self.student_mapping
+        mapped = current_usernames & mapping.keys()
         
+        participant_list = []
         for participant in participants:
             username = participant.get("user_name", "")
-            current_usernames.add(username)
             
             participant_dict = {
                 "zoom_username": username,
@@ -76,18 +81,14 @@ class ZoomEventHandler:
             }
             
             # Map to student ID if available
-            if username in self.student_mapping:
-                participant_dict["student_id"] = self.student_mapping[username]
+            if username in mapped:
+                participant_dict["student_id"] = mapping[username]
             
             participant_list.append(participant_dict)
         
-        # Update active participants
-        if meeting_id in self.active_participants:
-            self.active_participants[meeting_id] = current_usernames
-        
         return participant_list
     
-    def get_student_ids_from_participants(self, meeting_id: str) -> Set[int]:
+    async def get_student_ids_from_participants(self, meeting_id: str) -> Set[int]:
         """
         Get student IDs from current meeting participants
         
@@ -97,39 +98,88 @@ class ZoomEventHandler:
         Returns:
             Set of student IDs
         """
-        participants = self.get_participants(meeting_id)
-        student_ids = set()
+        _, current_usernames = await self._fetch_and_parse(meeting_id)
         
-        for participant in participants:
-            if "student_id" in participant:
-                student_ids.add(participant["student_id"])
-        
-        return student_ids
+        mapping = self.student_mapping
+        return {mapping[username] for username in current_usernames & mapping.keys()}
     
-    async def monitor_participants_async(
-        self,
-        meeting_id: str,
-        callback: callable,
-        interval_seconds: int = 30
-    ):
+    async def _fetch_and_parse(self, meeting_id: str) -> Tuple[List[Dict], Set[str]]:
         """
-        Asynchronously monitor participants and call callback on changes
+        Fetch a meeting's participants and record its current usernames
         
         Args:
             meeting_id: Zoom meeting ID
+        
+        Returns:
+            Raw Zoom participant records and the set of their usernames
+        
+        Raises:
+            Errors from ZoomAPI.fetch_meeting_participants, so a failed poll
+            is never mistaken for an empty meeting
+        """
+        participants = await self.zoom_api.fetch_meeting_participants(meeting_id)
+        current_usernames = {participant.get("user_name", "") for participant in participants}
+        
+        # Update active participants
+        if meeting_id in self.active_participants:
+            self.active_participants[meeting_id] = current_usernames
+        
+        return participants, current_usernames
+    
+    async def monitor_all(self, callback: callable, interval_seconds: int = 30):
+        """
+        Monitor every active meeting from a single polling loop
+        
+        Each tick fetches all meetings concurrently over the shared Zoom
+        client, then calls the callback for each. Ticks with any failure back
+        off exponentially (with jitter), honouring the largest Retry-After
+        seen.
+        
+        Args:
             callback: Async function to call with participant updates
             interval_seconds: Polling interval
         """
         self._running = True
+        failures = 0
         
-        while self._running and meeting_id in self.active_participants:
-            try:
-                participants = self.get_participants(meeting_id)
-                await callback(meeting_id, participants)
-            except Exception as e:
-                logger.error(f"Error in participant monitoring: {e}")
+        while self._running:
+            meeting_ids = list(self.active_participants)
+            results = await asyncio.gather(
+                *(self.get_participants(meeting_id) for meeting_id in meeting_ids),
+                return_exceptions=True
+            )
+            
+            retry_after = 0.0
+            updates = []
+            for meeting_id, result in zip(meeting_ids, results):
+                if isinstance(result, ZoomRateLimitError):
+                    retry_after = max(retry_after, result.retry_after)
+                elif isinstance(result, Exception):
+                    logger.error(f"Error in participant monitoring for meeting {meeting_id}: {result}")
+                else:
+                    updates.append((meeting_id, result))
             
-            await asyncio.sleep(interval_seconds)
+            callback_results = await asyncio.gather(
+                *(callback(meeting_id, participants) for meeting_id, participants in updates),
+                return_exceptions=True
+            )
+            callback_errors = [result for result in callback_results if isinstance(result, Exception)]
+            for error in callback_errors:
+                logger.error(f"Error in participant monitoring callback: {error}")
+            
+            if len(updates) < len(meeting_ids) or callback_errors:
+                failures += 1
+                delay = max(retry_after, self._backoff_delay(interval_seconds, failures))
+            else:
+                failures = 0
+                delay = interval_seconds
+            
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _backoff_delay(interval_seconds: float, failures: int) -> float:
+        """Capped exponential backoff with jitter so restarts don't retry in lockstep"""
+        return min(interval_seconds * 2 ** failures, MONITOR_BACKOFF_MAX) + random.uniform(0, 1)
     
     def stop_monitoring_all(self):
         """Stop all monitoring"""